@@ -0,0 +1 @@
+"""Route-level benchmarks; see benchmarks/run.py."""
@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import event, func
+
+from benchmarks.seed import seed
+from project import create_app, db
+from project.config import Config, engine_options
+from project.models import User, Event
+
+# ---------------------------------------------
+# Benchmarked Routes
+# ---------------------------------------------
+# name -> (function building a path from (rng, counts), role to log in as or None)
+ROUTES = {
+    'index': (lambda rng, counts: '/', None),
+    'event_detail': (lambda rng, counts: f"/event/{rng.randint(1, counts['events'])}", None),
+    'profile': (lambda rng, counts: f"/profile/{rng.randint(1, max(1, counts['users'] // 100))}", None),
+    'dashboard_public': (lambda rng, counts: '/auth/dashboard/public', 'public'),
+    'dashboard_admin': (lambda rng, counts: '/auth/dashboard/admin', 'admin'),
+}
+
+
+# Requests per route replayed under tracemalloc, after (not during) the timed ones
+MEMORY_SAMPLES = 5
+
+
+def configure(database_url, page_cache):
+    """Point the app at the benchmark database before create_app reads Config."""
+    Config.SQLALCHEMY_DATABASE_URI = database_url
+    Config.SQLALCHEMY_ENGINE_OPTIONS = engine_options(database_url)
+    # Measure the work a request really does, not a cached render
+    Config.PAGE_CACHE_TTL = Config.PAGE_CACHE_TTL if page_cache else 0
+    # Keep benchmark runs from flooding the request and slow-query logs
+    Config.REQUEST_LOG_ENABLED = False
+    Config.SLOW_QUERY_LOG_ENABLED = False
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of the whole process so far (seeding included),
+    or None where unavailable. Reported once per run, not per route.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_alloc_mb(client, paths):
+    """
+    Largest Python heap growth during any one request to ``paths``, traced
+    with tracemalloc. Memory allocated before the request (seeding, earlier
+    routes, warm caches) doesn't count towards it.
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for path in paths:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            client.get(path)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return round(max(peaks) / (1024 * 1024), 2) if peaks else None
+
+
+def _login(client, user_id):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+
+def bench_route(app, name, counts, requests, warmup, rng):
+    path_for, login_as = ROUTES[name]
+    client = app.test_client()
+    if login_as == 'admin':
+        _login(client, 1)
+    elif login_as == 'public':
+        _login(client, counts['users'])
+
+    queries = [0]
+
+    def _count(*args):
+        queries[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _count)
+    try:
+        for _ in range(warmup):
+            client.get(path_for(rng, counts))
+
+        latencies, query_counts, statuses = [], [], set()
+        for _ in range(requests):
+            path = path_for(rng, counts)
+            queries[0] = 0
+            start = time.perf_counter()
+            response = client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            query_counts.append(queries[0])
+            statuses.add(response.status_code)
+
+        # Tracing slows requests down, so memory gets its own pass
+        peak_alloc = peak_alloc_mb(client, [path_for(rng, counts) for _ in range(min(requests, MEMORY_SAMPLES))])
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
+
+    return {
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'queries_per_request': round(sum(query_counts) / len(query_counts), 2),
+        'max_queries': max(query_counts),
+        'peak_alloc_mb': peak_alloc,
+        'statuses': sorted(statuses),
+    }
+
+
+# ---------------------------------------------
+# Baseline Comparison
+# ---------------------------------------------
+def compare(results, baseline, tolerance):
+    """Print per-route deltas against ``baseline``; return the names of regressed routes."""
+    regressions = []
+    print(f"\n{'route':<18}{'p50 Δ':>10}{'p95 Δ':>10}{'queries':>16}")
+    for name, current in results['routes'].items():
+        previous = baseline.get('routes', {}).get(name)
+        if previous is None:
+            print(f"{name:<18}{'(new)':>10}")
+            continue
+
+        def delta(key):
+            return (current[key] - previous[key]) / previous[key] if previous[key] else 0.0
+
+        p50, p95 = delta('p50_ms'), delta('p95_ms')
+        queries = f"{previous['queries_per_request']:g} -> {current['queries_per_request']:g}"
+        regressed = p95 > tolerance or current['queries_per_request'] > previous['queries_per_request']
+        print(f"{name:<18}{p50:>+10.0%}{p95:>+10.0%}{queries:>16}{'  REGRESSED' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'route':<18}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}{'alloc MB':>10}  status")
+    for name, r in results['routes'].items():
+        print(
+            f"{name:<18}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['queries_per_request']:>10g}"
+            f"{r['peak_alloc_mb'] if r['peak_alloc_mb'] is not None else '-':>10}  {','.join(map(str, r['statuses']))}"
+        )
+    if results['meta'].get('peak_rss_mb') is not None:
+        print(f"\nProcess peak RSS (whole run, seeding included): {results['meta']['peak_rss_mb']} MB")
+
+
+def run_benchmarks(database_url=None, scale=1.0, requests=30, warmup=3, routes=None,
+                   page_cache=False, reseed=False):
+    if database_url is None:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='we4x-bench-'), 'bench.db')
+    configure(database_url, page_cache)
+
+    app = create_app()
+    with app.app_context():
+        if reseed:
+            db.drop_all()
+        db.create_all()
+        if db.session.query(User.id).first() is None:
+            started = time.perf_counter()
+            counts = seed(scale)
+            print(f"Seeded {counts} in {time.perf_counter() - started:.1f}s")
+        else:
+            # Reusing an existing database: benchmark against whatever it holds
+            counts = {
+                'users': db.session.query(func.max(User.id)).scalar(),
+                'events': db.session.query(func.max(Event.id)).scalar() or 1,
+            }
+            print("Database already populated; skipping seed (use --reseed to rebuild).")
+
+    rng = random.Random(1234)
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+            'database': database_url.split('://', 1)[0],
+            'scale': scale,
+            'requests': requests,
+            'page_cache': page_cache,
+            'python': platform.python_version(),
+        },
+        'routes': {},
+    }
+    for name in routes or ROUTES:
+        print(f"Benchmarking {name}...")
+        results['routes'][name] = bench_route(app, name, counts, requests, warmup, rng)
+    results['meta']['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the main routes against a seeded database.")
+    parser.add_argument("--database-url", help="Database to seed and benchmark (default: a temporary SQLite file)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the seeded row counts")
+    parser.add_argument("--requests", type=int, default=30, help="Measured requests per route")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured requests per route")
+    parser.add_argument("--route", action="append", choices=sorted(ROUTES), help="Only run this route (repeatable)")
+    parser.add_argument("--page-cache", action="store_true", help="Keep the anonymous page cache enabled")
+    parser.add_argument("--reseed", action="store_true", help="Drop and reseed an existing database")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previously saved results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 slowdown vs. the baseline")
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        database_url=args.database_url,
+        scale=args.scale,
+        requests=args.requests,
+        warmup=args.warmup,
+        routes=args.route,
+        page_cache=args.page_cache,
+        reseed=args.reseed
+    )
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        if regressions:
+            print(f"\nRegressed: {', '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,121 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, update
+
+from project.extensions import db
+from project.models import User, Event, Registration, Post, Comment, event_attendees
+
+# Row counts at --scale 1.0
+VOLUMES = {
+    'users': 100_000,
+    'posts': 50_000,
+    'comments': 500_000,
+    'events': 5_000,
+    'registrations': 200_000,
+    'attendees': 50_000,
+}
+
+BATCH_SIZE = 10_000
+ADMIN_EMAIL = 'bench-admin@example.com'
+
+
+def _insert(table, rows):
+    """Insert ``rows`` (an iterable of dicts) with executemany in BATCH_SIZE batches."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.session.execute(insert(table), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(table), batch)
+
+
+def seed(scale=1.0, seed_value=42):
+    """
+    Fill an empty database with deterministic, realistically shaped data and
+    return the row counts. User 1 is an admin and the first 1% of users are
+    team members who create the events.
+    """
+    rng = random.Random(seed_value)
+    counts = {name: max(1, int(n * scale)) for name, n in VOLUMES.items()}
+    now = datetime.utcnow()
+    n_users, n_posts, n_events = counts['users'], counts['posts'], counts['events']
+    n_team = max(1, n_users // 100)
+
+    def ago(days):
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+    _insert(User.__table__, (
+        {
+            'id': i,
+            'email': ADMIN_EMAIL if i == 1 else f'user{i}@example.com',
+            'name': f'User {i}',
+            'role': 'admin' if i == 1 else ('team' if i <= n_team else 'public'),
+            'headline': 'Benchmark user',
+            'profile_completed': True,
+            'created_at': ago(365),
+            'updated_at': now,
+        }
+        for i in range(1, n_users + 1)
+    ))
+
+    def events():
+        for i in range(1, n_events + 1):
+            # Half a year either side of now, so dashboards see past and upcoming events
+            start = now + timedelta(hours=rng.randint(-24 * 180, 24 * 180))
+            yield {
+                'id': i,
+                'title': f'Event {i}',
+                'description': 'Benchmark event ' * 10,
+                'start_datetime': start,
+                'end_datetime': start + timedelta(hours=2),
+                'created_by': rng.randint(1, n_team),
+                'capacity': rng.choice((None, 50, 100, 500)),
+                'created_at': ago(365),
+            }
+
+    _insert(Event.__table__, events())
+
+    _insert(Registration.__table__, (
+        {
+            'event_id': rng.randint(1, n_events),
+            'user_name': f'Guest {i}',
+            'user_email': f'guest{i}@example.com',
+            'created_at': ago(180),
+        }
+        for i in range(counts['registrations'])
+    ))
+    db.session.execute(update(Event).values(registration_count=(
+        select(func.count(Registration.id)).where(Registration.event_id == Event.id).scalar_subquery()
+    )))
+
+    pairs = set()
+    while len(pairs) < min(counts['attendees'], n_users * n_events):
+        pairs.add((rng.randint(1, n_users), rng.randint(1, n_events)))
+    _insert(event_attendees, ({'user_id': u, 'event_id': e, 'registered_at': now} for u, e in sorted(pairs)))
+
+    _insert(Post.__table__, (
+        {
+            'id': i,
+            'title': f'Post {i}',
+            'content': 'Lorem ipsum dolor sit amet. ' * 8,
+            'author_id': rng.randint(1, n_users),
+            'created_at': ago(365),
+        }
+        for i in range(1, n_posts + 1)
+    ))
+
+    _insert(Comment.__table__, (
+        {
+            'content': 'Nice post!',
+            'author_id': rng.randint(1, n_users),
+            'post_id': rng.randint(1, n_posts),
+            'created_at': ago(365),
+        }
+        for _ in range(counts['comments'])
+    ))
+
+    db.session.commit()
+    return counts
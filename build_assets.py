@@ -0,0 +1,17 @@
+import argparse
+from project.assets import STATIC_FOLDER, build_assets
+
+
+def main(static_folder, clean=False):
+    """Fingerprints CSS/JS assets and writes precompressed siblings plus a manifest."""
+    manifest = build_assets(static_folder, clean=clean)
+    for name, hashed in sorted(manifest.items()):
+        print(f"{name} -> {hashed}")
+    print(f"Wrote {len(manifest)} asset(s).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build fingerprinted, precompressed static assets.")
+    parser.add_argument("--static-folder", default=STATIC_FOLDER, help="Static folder to build from")
+    parser.add_argument("--clean", action="store_true", help="Remove previous build output first")
+    args = parser.parse_args()
+    main(args.static_folder, args.clean)
@@ -0,0 +1,156 @@
+import argparse
+import re
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, event, or_, select
+
+from project import create_app, db
+from project.models import User, OAuthToken, Event, Registration, Post, PostLike, TimelineEntry, Job, Comment, event_attendees
+
+load_dotenv(override=True)
+
+
+# ---------------------------------------------
+# Registered Hot Queries
+# ---------------------------------------------
+# Each entry mirrors a query issued on a hot request path. The check fails
+# if any of them has to scan a whole table instead of using an index.
+def hot_queries():
+    now = datetime.utcnow()
+    return {
+        'feed first page': select(Post)
+            .order_by(Post.created_at.desc(), Post.id.desc()).limit(21),
+        'feed next page': select(Post)
+            .where(or_(Post.created_at < now, and_(Post.created_at == now, Post.id < 1000)))
+            .order_by(Post.created_at.desc(), Post.id.desc()).limit(21),
+        'timeline page': select(TimelineEntry.created_at, TimelineEntry.post_id)
+            .where(TimelineEntry.audience == 'public',
+                   or_(TimelineEntry.created_at < now,
+                       and_(TimelineEntry.created_at == now, TimelineEntry.post_id < 1000)))
+            .order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc()).limit(21),
+        'feed comment counts': select(Post.id, Post.comment_count)
+            .order_by(Post.created_at.desc(), Post.id.desc()).limit(21),
+        'comment thread page': select(Comment)
+            .where(Comment.post_id == 1,
+                   or_(Comment.created_at > now, and_(Comment.created_at == now, Comment.id > 100)))
+            .order_by(Comment.created_at, Comment.id).limit(21),
+        'feed liked posts': select(PostLike.post_id)
+            .where(PostLike.user_id == 1, PostLike.post_id.in_([1, 2, 3])),
+        'upcoming events': select(Event)
+            .where(Event.start_datetime > now).order_by(Event.start_datetime),
+        'team dashboard events': select(Event)
+            .where(Event.created_by == 1).order_by(Event.start_datetime.desc()),
+        'event registrations': select(Registration)
+            .where(Registration.event_id == 1),
+        'registrant page': select(Registration)
+            .where(Registration.event_id == 1, Registration.id > 100).order_by(Registration.id).limit(51),
+        'registration duplicate check': select(Registration)
+            .where(Registration.event_id == 1,
+                   or_(Registration.user_email == 'a@example.com', Registration.idempotency_key == 'key')),
+        'event attendees': select(event_attendees)
+            .where(event_attendees.c.event_id.in_([1, 2, 3])),
+        'team members': select(User)
+            .where(User.role == 'team'),
+        'due jobs': select(Job.id)
+            .where(Job.status == 'queued', Job.run_at <= now).order_by(Job.run_at, Job.id).limit(2),
+        'oauth token lookup': select(OAuthToken)
+            .where(OAuthToken.name == 'google', OAuthToken.user_id == 1),
+    }
+
+
+class _Captured(Exception):
+    def __init__(self, statement, parameters):
+        self.statement = statement
+        self.parameters = parameters
+
+
+def _capture(conn, stmt):
+    """Return the DBAPI statement and parameters for ``stmt`` without running it."""
+    def _intercept(conn, cursor, statement, parameters, context, executemany):
+        raise _Captured(statement, parameters)
+
+    event.listen(conn, 'before_cursor_execute', _intercept)
+    try:
+        conn.execute(stmt)
+    except _Captured as captured:
+        return captured.statement, captured.parameters
+    finally:
+        event.remove(conn, 'before_cursor_execute', _intercept)
+    raise RuntimeError('Statement was not executed')
+
+
+# ---------------------------------------------
+# Plan Inspection
+# ---------------------------------------------
+def _sqlite_seq_scans(cursor, statement, parameters, tables):
+    cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+    scans = []
+    for row in cursor.fetchall():
+        match = re.match(r'SCAN (?:TABLE )?(\w+)(?: AS \w+)?$', row[-1])
+        if match and match.group(1) in tables:
+            scans.append(match.group(1))
+    return scans
+
+
+def _postgres_seq_scans(cursor, statement, parameters, tables):
+    # With sequential scans disabled, a Seq Scan node only survives in the
+    # plan when no index can serve the predicate at all.
+    cursor.execute('SET LOCAL enable_seqscan = off')
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+    plan = cursor.fetchone()[0][0]['Plan']
+
+    scans = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in tables:
+            scans.append(node['Relation Name'])
+        stack.extend(node.get('Plans', []))
+    return scans
+
+
+def check_query_plans(verbose=False):
+    """Explain every hot query; returns the names of those that fall back to a scan."""
+    app = create_app()
+    failures = []
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if dialect == 'sqlite':
+            inspect_plan = _sqlite_seq_scans
+        elif dialect == 'postgresql':
+            inspect_plan = _postgres_seq_scans
+        else:
+            raise SystemExit(f"Unsupported database dialect: {dialect}")
+
+        tables = set(db.metadata.tables)
+        with db.engine.connect() as conn:
+            for name, stmt in hot_queries().items():
+                statement, parameters = _capture(conn, stmt)
+                cursor = conn.connection.dbapi_connection.cursor()
+                try:
+                    scans = inspect_plan(cursor, statement, parameters, tables)
+                finally:
+                    cursor.close()
+                conn.rollback()
+
+                if scans:
+                    failures.append(name)
+                    print(f"FAIL  {name}: sequential scan on {', '.join(sorted(set(scans)))}")
+                elif verbose:
+                    print(f"ok    {name}")
+
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if a hot query falls back to a sequential scan.")
+    parser.add_argument("--verbose", action="store_true", help="Also list queries that use an index")
+    args = parser.parse_args()
+
+    failed = check_query_plans(verbose=args.verbose)
+    if failed:
+        print(f"{len(failed)} hot query plan(s) need an index.")
+        sys.exit(1)
+    print("All hot queries use indexes.")
@@ -0,0 +1,71 @@
+import argparse
+import os
+from dotenv import load_dotenv
+from project import create_app, db
+from project.models import User, Event, Post, SiteConfig
+from project.storage import LocalStorage
+from project.uploads import CONTENT_ADDRESSED, IMAGE_VARIANTS, content_address, generate_variants, is_variant, variant_name
+
+load_dotenv(override=True)
+
+# Columns that store an upload's filename
+UPLOAD_COLUMNS = (
+    (User, 'profile_picture'),
+    (Event, 'banner_image'),
+    (Post, 'post_image'),
+)
+
+
+def dedupe_uploads(dry_run=False):
+    """Moves legacy uploads to content-addressed names, merging identical files."""
+    app = create_app()
+    with app.app_context(), app.test_request_context():
+        folder = app.config['UPLOAD_FOLDER']
+
+        renames = {}
+        for filename in sorted(os.listdir(folder)):
+            path = os.path.join(folder, filename)
+            if CONTENT_ADDRESSED.match(filename) or is_variant(filename) or not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as fh:
+                renames[filename] = content_address(fh.read(), filename)
+
+        print(f"{len(renames)} legacy file(s) -> {len(set(renames.values()))} blob(s)")
+        if dry_run or not renames:
+            return
+
+        # Point database rows at the new names before touching the files
+        for model, column in UPLOAD_COLUMNS:
+            for old, new in renames.items():
+                model.query.filter(getattr(model, column) == old).update({column: new}, synchronize_session=False)
+
+        site_config = SiteConfig.query.get(1)
+        banner = site_config.banner_image if site_config else None
+        if banner and os.path.basename(banner) in renames:
+            from flask import url_for
+            site_config.banner_image = url_for('main.media', filename=renames[os.path.basename(banner)])
+        db.session.commit()
+
+        for old, new in renames.items():
+            old_path, new_path = os.path.join(folder, old), os.path.join(folder, new)
+            if os.path.exists(new_path):
+                os.remove(old_path)
+            else:
+                os.replace(old_path, new_path)
+            for variant in IMAGE_VARIANTS:
+                legacy_variant = os.path.join(folder, variant_name(old, variant))
+                if os.path.exists(legacy_variant):
+                    os.remove(legacy_variant)
+
+        for new in set(renames.values()):
+            try:
+                generate_variants(LocalStorage(folder), new)
+            except Exception as e:
+                print(f"Skipped variants for {new}: {e}")
+        print("Uploads deduplicated.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert legacy uploads to content-addressed storage.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many blobs would remain")
+    args = parser.parse_args()
+    dedupe_uploads(args.dry_run)
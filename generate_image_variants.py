@@ -0,0 +1,34 @@
+import argparse
+import os
+from dotenv import load_dotenv
+from project import create_app
+from project.storage import LocalStorage
+from project.uploads import IMAGE_VARIANTS, generate_variants, is_variant, variant_name
+
+load_dotenv(override=True)
+
+
+def generate_image_variants(force=False):
+    """Creates resized WebP variants for uploads saved before the image pipeline existed."""
+    app = create_app()
+    with app.app_context():
+        folder = app.config['UPLOAD_FOLDER']
+        storage = LocalStorage(folder)
+
+        for filename in sorted(os.listdir(folder)):
+            if is_variant(filename) or not os.path.isfile(os.path.join(folder, filename)):
+                continue
+            done = all(os.path.exists(os.path.join(folder, variant_name(filename, v))) for v in IMAGE_VARIANTS)
+            if done and not force:
+                continue
+            try:
+                generate_variants(storage, filename)
+                print(f"Generated variants for {filename}")
+            except Exception as e:
+                print(f"Skipped {filename}: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate resized WebP variants for existing uploads.")
+    parser.add_argument("--force", action="store_true", help="Regenerate variants that already exist")
+    args = parser.parse_args()
+    generate_image_variants(args.force)
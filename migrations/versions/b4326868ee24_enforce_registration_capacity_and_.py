@@ -0,0 +1,50 @@
+"""enforce registration capacity and uniqueness
+
+Revision ID: b4326868ee24
+Revises: 9b5b2edc1401
+Create Date: 2026-10-18 11:27:11.562904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4326868ee24'
+down_revision = '9b5b2edc1401'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('registration_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Emails are compared case-insensitively from now on; fold existing rows
+    # and drop the duplicates they produce, keeping each earliest registration.
+    op.execute("UPDATE registration SET user_email = lower(trim(user_email)) WHERE user_email IS NOT NULL")
+    op.execute(
+        "DELETE FROM registration WHERE id NOT IN ("
+        " SELECT min_id FROM (SELECT MIN(id) AS min_id FROM registration GROUP BY event_id, user_email) AS keep"
+        ") AND user_email IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE event SET registration_count = ("
+        " SELECT COUNT(*) FROM registration WHERE registration.event_id = event.id"
+        ")"
+    )
+
+    with op.batch_alter_table('registration', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_registration_event_id_user_email', ['event_id', 'user_email'])
+        batch_op.create_unique_constraint('uq_registration_idempotency_key', ['idempotency_key'])
+
+
+def downgrade():
+    with op.batch_alter_table('registration', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_registration_idempotency_key', type_='unique')
+        batch_op.drop_constraint('uq_registration_event_id_user_email', type_='unique')
+        batch_op.drop_column('idempotency_key')
+
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_column('registration_count')
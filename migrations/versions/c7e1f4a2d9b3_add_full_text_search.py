@@ -0,0 +1,81 @@
+"""add full text search
+
+Revision ID: c7e1f4a2d9b3
+Revises: 93d8e255cd2b
+Create Date: 2026-10-18 11:40:12.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e1f4a2d9b3'
+down_revision = '93d8e255cd2b'
+branch_labels = None
+depends_on = None
+
+# (kind code, table, title column, body expression, columns that affect the index)
+SQLITE_SOURCES = (
+    (1, 'post', 'title', "{r}.content", 'title, content'),
+    (2, 'event', 'title', "{r}.description", 'title, description'),
+    (3, 'users', 'name',
+     "coalesce({r}.headline, '') || ' ' || coalesce({r}.skills, '') || ' ' || coalesce({r}.company, '')",
+     'name, headline, skills, company'),
+)
+
+POSTGRES_SOURCES = (
+    ('post', "coalesce(title, '')", "coalesce(content, '')"),
+    ('event', "coalesce(title, '')", "coalesce(description, '')"),
+    ('users', "coalesce(name, '')",
+     "coalesce(headline, '') || ' ' || coalesce(skills, '') || ' ' || coalesce(company, '')"),
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        # One FTS5 table; rowid = id * 4 + kind code, maintained by triggers
+        op.execute("CREATE VIRTUAL TABLE search_index USING fts5(title, body, tokenize='porter unicode61')")
+        for code, table, title, body, watched in SQLITE_SOURCES:
+            insert_new = (
+                f"INSERT INTO search_index (rowid, title, body) "
+                f"VALUES (new.id * 4 + {code}, new.{title}, {body.format(r='new')});"
+            )
+            delete_old = f"DELETE FROM search_index WHERE rowid = old.id * 4 + {code};"
+            op.execute(f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} BEGIN {insert_new} END")
+            op.execute(
+                f"CREATE TRIGGER {table}_search_au AFTER UPDATE OF {watched} ON {table} "
+                f"BEGIN {delete_old} {insert_new} END"
+            )
+            op.execute(f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} BEGIN {delete_old} END")
+            op.execute(
+                f"INSERT INTO search_index (rowid, title, body) "
+                f"SELECT t.id * 4 + {code}, t.{title}, {body.format(r='t')} FROM {table} AS t"
+            )
+
+    elif dialect == 'postgresql':
+        # Generated tsvector columns (backfilled on creation) with GIN indexes
+        for table, title, body in POSTGRES_SOURCES:
+            op.execute(
+                f"ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+                f"setweight(to_tsvector('english', {title}), 'A') || "
+                f"setweight(to_tsvector('english', {body}), 'B')) STORED"
+            )
+            op.execute(f"CREATE INDEX ix_{table}_search_vector ON {table} USING gin (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        for _, table, _, _, _ in SQLITE_SOURCES:
+            for suffix in ('ai', 'au', 'ad'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+        op.execute("DROP TABLE IF EXISTS search_index")
+
+    elif dialect == 'postgresql':
+        for table, _, _ in POSTGRES_SOURCES:
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
@@ -1,26 +1,87 @@
 # project/__init__.py
+import logging
+
 from flask import Flask
 from .extensions import db, login_manager, migrate, oauth
+from .cache import user_cache, site_config_cache, page_cache
+from .assets import assets
+from .instrumentation import instrumentation
+from .query_log import slow_query_log
+from .search import include_object
+from .likes import like_counter
+from .jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+
+def _configure_logging(app):
+    """
+    Set the level of the ``project`` loggers and, unless the host process
+    (gunicorn, a logging config) already set up handlers, print them to
+    stderr so INFO lines show up without DEBUG.
+    """
+    logger.setLevel(app.config['LOG_LEVEL'])
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        logger.addHandler(handler)
+
+
+def _log_pool_settings(app):
+    """Log the connection pool settings the engine was built with."""
+    options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    poolclass = options.get('poolclass')
+    logger.info(
+        "Database pool: %s size=%s max_overflow=%s timeout=%s recycle=%s pre_ping=%s",
+        poolclass.__name__ if poolclass else 'default',
+        options.get('pool_size', 'default'),
+        options.get('max_overflow', 'default'),
+        options.get('pool_timeout', 'default'),
+        options.get('pool_recycle', 'default'),
+        options.get('pool_pre_ping', 'default')
+    )
+
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object('project.config.Config')
+    _configure_logging(app)
 
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Keep autogenerate away from the full-text index, which lives outside the models
+    migrate.init_app(app, db, include_object=include_object)
     login_manager.init_app(app)
     oauth.init_app(app)
+    user_cache.init_app(app)
+    site_config_cache.init_app(app)
+    page_cache.init_app(app)
+    assets.init_app(app)
+    instrumentation.init_app(app)
+    slow_query_log.init_app(app)
+    like_counter.init_app(app)
+    job_queue.init_app(app)
+
+    from project.storage import init_storage
+    init_storage(app)
+
+    from project.timeline import init_timeline
+    init_timeline(app)
 
-    # Move User import here after db is initialized to avoid circular dependencies
-    from project.models import User
+    from project.calendar_sync import init_calendar_sync
+    init_calendar_sync(app)
+
+    _log_pool_settings(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return user_cache.load(int(user_id))
 
     login_manager.login_view = 'auth.login'
 
+    from project.uploads import upload_url
+    app.add_template_global(upload_url)
+
     # Initialize OAuth clients
     from project.oauth_helpers import init_oauth
     init_oauth(app)
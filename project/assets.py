@@ -0,0 +1,162 @@
+# project/assets.py
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import Response, request, send_from_directory
+
+STATIC_FOLDER = os.path.join(os.path.dirname(__file__), 'static')
+
+# Fingerprinted copies are written under static/dist and listed in its manifest
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ASSET_EXTENSIONS = ('.css', '.js', '.svg')
+SKIP_DIRS = ('uploads', DIST_DIR)
+
+# Content-Encoding -> precompressed sibling suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+# ------------------------
+# Build Step
+# ------------------------
+def _compress_br(data):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def _compress_gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+
+
+def build_assets(static_folder=STATIC_FOLDER, clean=False):
+    """
+    Copy every CSS/JS asset to ``dist/<path>.<hash><ext>`` with ``.br``/``.gz``
+    siblings, and write ``dist/manifest.json`` mapping source names to them.
+    Brotli output needs the optional ``brotli`` package and is skipped without it.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    if clean and os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        if dirpath == static_folder:
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in sorted(filenames):
+            if not filename.endswith(ASSET_EXTENSIONS):
+                continue
+            source = os.path.join(dirpath, filename)
+            name = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as fh:
+                data = fh.read()
+
+            stem, ext = os.path.splitext(name)
+            hashed = f"{DIST_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+            target = os.path.join(static_folder, hashed)
+            _write(target, data)
+
+            for compress, suffix in ((_compress_br, '.br'), (_compress_gzip, '.gz')):
+                compressed = compress(data)
+                # Tiny files can grow when compressed; serve those as-is
+                if compressed is not None and len(compressed) < len(data):
+                    _write(target + suffix, compressed)
+
+            manifest[name] = hashed
+
+    _write(os.path.join(dist, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+# ------------------------
+# Serving
+# ------------------------
+class Assets:
+    """
+    Rewrites ``url_for('static', filename=...)`` to fingerprinted names from
+    the build manifest and serves those with far-future ``immutable`` caching,
+    preferring a precompressed sibling the client accepts.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.encodings = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.max_age = app.config['STATIC_MAX_AGE']
+        self.accel_prefix = app.config['STATIC_ACCEL_REDIRECT']
+        self.load_manifest()
+
+        app.url_defaults(self._rewrite_url)
+        app.view_functions['static'] = self.send_static
+        app.extensions['assets'] = self
+
+    def load_manifest(self):
+        path = os.path.join(self.static_folder, DIST_DIR, MANIFEST_NAME)
+        try:
+            with open(path) as fh:
+                self.manifest = json.load(fh)
+        except FileNotFoundError:
+            # No build yet (e.g. development): fall back to the source files
+            self.manifest = {}
+
+        # Record which precompressed siblings exist once, not per request
+        self.encodings = {
+            hashed: [
+                (encoding, suffix) for encoding, suffix in ENCODINGS
+                if os.path.exists(os.path.join(self.static_folder, hashed + suffix))
+            ]
+            for hashed in self.manifest.values()
+        }
+
+    def _rewrite_url(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]
+
+    def send_static(self, filename):
+        if filename not in self.encodings:
+            # Unversioned files keep Flask's default revalidating behaviour
+            return send_from_directory(self.static_folder, filename)
+
+        path, encoding = filename, None
+        for candidate, suffix in self.encodings[filename]:
+            if candidate in request.accept_encodings:
+                path, encoding = filename + suffix, candidate
+                break
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if self.accel_prefix:
+            # Let the front-end proxy stream the file from an internal location
+            response = Response(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = f"{self.accel_prefix.rstrip('/')}/{path}"
+        else:
+            # With USE_X_SENDFILE this emits an X-Sendfile header instead of the body
+            response = send_from_directory(
+                self.static_folder, path, mimetype=mimetype, max_age=self.max_age
+            )
+
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        response.cache_control.immutable = True
+        return response
+
+
+assets = Assets()
@@ -1,19 +1,26 @@
 # project/blueprints/auth.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, session, jsonify, abort
 from flask_login import login_user, logout_user, login_required, current_user
-from sqlalchemy.orm import joinedload
 from datetime import datetime
 from werkzeug.utils import secure_filename
-import os
 import secrets
 
 from project.models import db, User, Event, Post, Comment, YoutubeLink
 from project.forms import LoginForm, PostForm, CommentForm
+from project.feed import get_comment_page, get_feed_page
+from project.likes import like_counter, liked_post_ids, toggle_like
+from project.timeline import publish_post, retract_post
+from project.loaders import post_list_options, event_list_options
+from project.stats import get_dashboard_stats, community_counts, annotate_event_counts
 from flask_wtf import FlaskForm
 from wtforms import SubmitField
 from authlib.jose.errors import ExpiredTokenError
 from authlib.integrations.base_client.errors import MismatchingStateError
-from project.oauth_helpers import oauth  # <- global OAuth instance
+from project.oauth_helpers import oauth, update_token  # <- global OAuth instance
+from project.calendar_sync import resume_sync
+from project.cache import user_cache
+from project.query_log import slow_query_log
+from project.uploads import save_image_upload, upload_url
 
 # ---------------------------------------------
 # Blueprint Setup
@@ -78,6 +85,10 @@ def google_authorize():
             db.session.add(user)
         db.session.commit()
         login_user(user)
+        if current_app.config["CALENDAR_SYNC_BACKEND"]:
+            # Kept for calendar_sync, which refreshes it when it expires
+            update_token("google", token)
+            resume_sync(user.id)
         return redirect(url_for("auth.dashboard_public"))
 
     except MismatchingStateError:
@@ -129,21 +140,52 @@ def dashboard_admin():
         flash("Access denied: Admins only.", "danger")
         return redirect(url_for('auth.dashboard'))
 
-    events = Event.query.all()
-    posts = Post.query.options(joinedload(Post.author), joinedload(Post.comments)).order_by(Post.created_at.desc()).all()
-    team_members = User.query.filter_by(role=current_app.config['ROLES']['TEAM']).all()
+    now = datetime.utcnow()
+    events, events_page, events_has_next = _admin_page(
+        Event.query.options(*event_list_options()).order_by(Event.start_datetime.desc(), Event.id.desc()),
+        'events_page'
+    )
+    posts, posts_page, posts_has_next = _admin_page(
+        Post.query.options(*post_list_options()).order_by(Post.created_at.desc(), Post.id.desc()),
+        'posts_page'
+    )
 
     return render_template(
         'dashboard_admin.html',
-        events=events,
+        events=annotate_event_counts(events),
+        events_page=events_page,
+        events_has_next=events_has_next,
         posts=posts,
-        user_count=User.query.count(),
-        team_count=len(team_members),
-        team_members=team_members,
-        now=datetime.utcnow()
+        posts_page=posts_page,
+        posts_has_next=posts_has_next,
+        stats=get_dashboard_stats(now),
+        now=now
     )
 
 
+def _admin_page(query, arg):
+    """One page of an admin table as ``(items, page, has_next)``; the page number is read from ``arg``."""
+    page = max(request.args.get(arg, 1, type=int), 1)
+    page_size = current_app.config['ADMIN_PAGE_SIZE']
+    items = query.limit(page_size + 1).offset((page - 1) * page_size).all()
+    return items[:page_size], page, len(items) > page_size
+
+
+@auth_bp.route('/dashboard/admin/slow-queries')
+@login_required
+def slow_queries():
+    if current_user.role != current_app.config['ROLES']['ADMIN']:
+        flash("Access denied: Admins only.", "danger")
+        return redirect(url_for('auth.dashboard'))
+
+    kind = request.args.get('kind')
+    entries = slow_query_log.recent()
+    if kind:
+        entries = [entry for entry in entries if entry.get('kind') == kind]
+
+    return render_template('slow_queries.html', entries=entries, kind=kind)
+
+
 # ---------------------------------------------
 # TEAM DASHBOARD
 # ---------------------------------------------
@@ -169,9 +211,18 @@ def dashboard_public():
     comment_form = CommentForm()
     delete_form = DeletePostForm()
 
-    posts = Post.query.options(joinedload(Post.author), joinedload(Post.comments)).order_by(Post.created_at.desc()).all()
-    user_count = User.query.count()
-    events = Event.query.filter(Event.start_datetime > datetime.utcnow()).order_by(Event.start_datetime).all()
+    try:
+        posts, next_cursor = get_feed_page(request.args.get('cursor'))
+    except ValueError:
+        return redirect(url_for('auth.dashboard_public'))
+
+    events = (
+        Event.query.filter(Event.start_datetime > datetime.utcnow())
+        .order_by(Event.start_datetime)
+        .limit(current_app.config['FEED_UPCOMING_EVENTS'])
+        .all()
+    )
+    post_count, user_count = community_counts()
 
     # YouTube embed
     youtube_obj = YoutubeLink.query.first()
@@ -186,15 +237,39 @@ def dashboard_public():
     return render_template(
         'dashboard_public.html',
         posts=posts,
+        liked_ids=liked_post_ids(current_user.id, [post.id for post in posts]),
+        next_cursor=next_cursor,
         post_form=post_form,
         comment_form=comment_form,
         delete_form=delete_form,
+        post_count=post_count,
         user_count=user_count,
         events=events,
         youtube_link=youtube_link
     )
 
 
+# ---------------------------------------------
+# PUBLIC FEED (LOAD MORE)
+# ---------------------------------------------
+@auth_bp.route('/dashboard/public/feed')
+@login_required
+def feed_page():
+    try:
+        posts, next_cursor = get_feed_page(request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+
+    html = render_template(
+        'partials/feed_posts.html',
+        posts=posts,
+        liked_ids=liked_post_ids(current_user.id, [post.id for post in posts]),
+        comment_form=CommentForm(),
+        delete_form=DeletePostForm()
+    )
+    return jsonify(html=html, next_cursor=next_cursor)
+
+
 # ---------------------------------------------
 # CREATE POST
 # ---------------------------------------------
@@ -205,8 +280,7 @@ def create_post():
     if form.validate_on_submit():
         filename = None
         if form.post_image.data:
-            filename = secure_filename(form.post_image.data.filename)
-            form.post_image.data.save(os.path.join(current_app.root_path, 'static/uploads', filename))
+            filename = save_image_upload(form.post_image.data, secure_filename(form.post_image.data.filename))
 
         new_post = Post(
             title=form.title.data,
@@ -216,6 +290,7 @@ def create_post():
         )
         db.session.add(new_post)
         db.session.commit()
+        publish_post(new_post)
         flash("Post created successfully!", "success")
     else:
         flash("Post creation failed. Check your input.", "danger")
@@ -223,20 +298,77 @@ def create_post():
 
 
 # ---------------------------------------------
-# COMMENT POST
+# COMMENTS
 # ---------------------------------------------
+def comment_json(comment):
+    author = comment.author
+    return {
+        'id': comment.id,
+        'post_id': comment.post_id,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat() if comment.created_at else None,
+        'author': {
+            'id': author.id,
+            'name': author.name,
+            'avatar_url': upload_url(author.profile_picture, 'avatar_48') if author.profile_picture else None,
+        } if author else None,
+    }
+
+
+@auth_bp.route('/post/<int:post_id>/comments')
+@login_required
+def post_comments(post_id):
+    """One page of a post's thread; the feed fetches it when the thread is expanded."""
+    if db.session.get(Post, post_id) is None:
+        abort(404)
+    try:
+        comments, next_cursor = get_comment_page(post_id, request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+
+    html = render_template('partials/comment_items.html', comments=comments)
+    return jsonify(comments=[comment_json(c) for c in comments], html=html, next_cursor=next_cursor)
+
+
 @auth_bp.route('/post/<int:post_id>/comment', methods=['POST'])
 @login_required
 def comment_post(post_id):
+    post = db.session.get(Post, post_id)
+    if post is None:
+        abort(404)
+
     form = CommentForm()
-    if form.validate_on_submit():
-        comment = Comment(content=form.content.data, author_id=current_user.id, post_id=post_id)
-        db.session.add(comment)
-        db.session.commit()
-        flash("Comment added!", "success")
-    else:
-        flash("Comment cannot be empty.", "warning")
-    return redirect(url_for('auth.dashboard_public'))
+    if not form.validate_on_submit():
+        return jsonify(error="Comment cannot be empty.", errors=form.errors), 400
+
+    comment = Comment(content=form.content.data, author_id=current_user.id, post_id=post.id)
+    db.session.add(comment)
+    db.session.commit()
+
+    html = render_template('partials/comment_items.html', comments=[comment])
+    return jsonify(comment=comment_json(comment), html=html, comment_count=post.comment_count), 201
+
+
+# ---------------------------------------------
+# LIKES
+# ---------------------------------------------
+@auth_bp.route('/post/<int:post_id>/like', methods=['POST'])
+@login_required
+def like_post(post_id):
+    """Toggle the current user's like, or set it with ``{"liked": true|false}``."""
+    # JSON only: a cross-site form can't send it without a CORS preflight
+    if not request.is_json:
+        abort(415)
+    post = db.session.get(Post, post_id)
+    if post is None:
+        abort(404)
+
+    liked = (request.get_json(silent=True) or {}).get('liked')
+    if liked is not None and not isinstance(liked, bool):
+        return jsonify(error='liked must be true or false'), 400
+
+    liked = toggle_like(current_user.id, post.id, liked)
+    return jsonify(liked=liked, like_count=like_counter.like_count(post))
 
 
 # ---------------------------------------------
@@ -252,6 +384,7 @@ def delete_post(post_id):
 
     db.session.delete(post)
     db.session.commit()
+    retract_post(post_id)
     flash('Post deleted successfully.', 'success')
     return redirect(url_for('auth.dashboard_public'))
 
@@ -286,6 +419,7 @@ def add_team_member():
     if user:
         user.role = current_app.config['ROLES']['TEAM']
         db.session.commit()
+        user_cache.invalidate(user.id)
         flash(f'User {email} updated to team member.', 'success')
     else:
         password = secrets.token_urlsafe(12)
@@ -308,6 +442,7 @@ def remove_team_member(user_id):
     user = User.query.get_or_404(user_id)
     user.role = current_app.config['ROLES']['PUBLIC']
     db.session.commit()
+    user_cache.invalidate(user.id)
     flash(f'Team member {user.email} removed.', 'success')
     return redirect(url_for('auth.manage_team'))
 
@@ -337,5 +472,6 @@ def update_password():
 
     current_user.set_password(new_password)
     db.session.commit()
+    user_cache.invalidate(current_user.id)
     flash('Password updated successfully.', 'success')
     return redirect(url_for('auth.update_password_page'))
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from project.models import db, Post, Message, Comment
 from project.forms import PostForm, CommentForm
+from project.timeline import publish_post
 
 community_bp = Blueprint('community', __name__)
 
@@ -22,6 +23,7 @@ def create_post():
         post = Post(title=form.title.data, content=form.content.data, author=current_user)
         db.session.add(post)
         db.session.commit()
+        publish_post(post)
         flash('Your post has been created!', 'success')
         return redirect(url_for('community.post_list'))
     return render_template('create_post.html', title='New Post', form=form)
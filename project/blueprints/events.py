@@ -1,26 +1,37 @@
-from flask import Blueprint, request, render_template, flash, redirect, url_for, current_app
+import io
+from flask import (
+    Blueprint, request, render_template, flash, redirect, url_for, current_app, jsonify, abort, Response,
+    stream_with_context
+)
 from flask_login import current_user, login_required
-from ..models import db, Event, Registration
+from ..models import db, Event
+from ..cache import page_cache
+from ..uploads import save_image_upload
+from ..calendar_sync import queue_event_sync, DELETE
+from ..registrations import (
+    register_for_event, normalize_email, import_registrations, read_registration_csv, get_registrant_page,
+    CREATED, ALREADY_REGISTERED, EVENT_FULL, EVENT_NOT_FOUND, ImportAborted
+)
+from ..exports import stream_csv, stream_ndjson
 import dateutil.parser
 from werkzeug.utils import secure_filename
-import os
-from datetime import datetime
 
 events_bp = Blueprint('events', __name__)
 
+
+def can_manage_event(event):
+    """Organizers (the event's creator) and admins may see and edit its participants."""
+    return current_user.is_authenticated and (
+        current_user.role == current_app.config['ROLES']['ADMIN'] or event.created_by == current_user.id
+    )
+
+
 # Helper: Handle Event Banner Upload
 def handle_event_banner_upload():
     if 'banner_image' in request.files:
         file = request.files['banner_image']
         if file and file.filename:
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"event_{timestamp}_{filename}"
-            upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-            os.makedirs(upload_folder, exist_ok=True)
-            file_path = os.path.join(upload_folder, filename)
-            file.save(file_path)
-            return filename
+            return save_image_upload(file, secure_filename(file.filename))
     return None
 
 @events_bp.route('/create_event', methods=['GET','POST'])
@@ -49,6 +60,8 @@ def create_event():
             created_by=current_user.id
         )
         db.session.add(ev)
+        db.session.flush()
+        queue_event_sync(ev)
         db.session.commit()
         flash('Event created', 'success')
         return redirect(url_for('auth.dashboard_team'))
@@ -57,25 +70,137 @@ def create_event():
 
 
 @events_bp.route('/event/<int:event_id>')
+@page_cache.cached
 def event_detail(event_id):
     ev = Event.query.get_or_404(event_id)
-    regs = Registration.query.filter_by(event_id=ev.id).all()
-    return render_template('event_detail.html', event=ev, regs=regs)
+    # The public page only shows the maintained count; organizers fetch the
+    # registrant list page by page from events.registrant_page.
+    return render_template('event_detail.html', event=ev, can_manage=can_manage_event(ev))
+
+
+@events_bp.route('/event/<int:event_id>/registrations')
+@login_required
+def registrant_page(event_id):
+    ev = Event.query.get_or_404(event_id)
+    if not can_manage_event(ev):
+        abort(403)
+
+    registrations, next_after = get_registrant_page(ev.id, request.args.get('after', type=int))
+    html = render_template('partials/registrant_rows.html', registrations=registrations)
+    return jsonify(html=html, next_after=next_after)
+
+
+REGISTRATION_RESPONSES = {
+    CREATED: (201, 'Registered successfully', 'success'),
+    ALREADY_REGISTERED: (200, 'You are already registered for this event', 'info'),
+    EVENT_FULL: (409, 'Sorry, this event is full', 'danger'),
+}
+
+
+# Registration.idempotency_key column width
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
 
 
 @events_bp.route('/register/<int:event_id>', methods=['POST'])
 def register(event_id):
+    """Register for an event from the detail page form or as JSON.
+
+    Retries are safe: send the same ``Idempotency-Key`` header (or
+    ``idempotency_key`` field) and the original registration is returned.
+    """
+    data = request.get_json(silent=True) if request.is_json else request.form
+    if not isinstance(data, dict):
+        data = {}
+    name = data.get('name')
+    email = data.get('email')
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
+    error = None
+    if not isinstance(name, str) or not isinstance(email, str) or not name.strip() or not normalize_email(email):
+        error = 'name and email are required'
+    elif idempotency_key is not None and (
+        not isinstance(idempotency_key, str) or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH
+    ):
+        error = f'idempotency_key must be a string of at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters'
+    if error:
+        if request.is_json:
+            return jsonify(error=error), 400
+        flash(error.capitalize(), 'danger')
+        return redirect(url_for('events.event_detail', event_id=event_id))
+    name = name.strip()
+
+    result = register_for_event(event_id, name, email, idempotency_key)
+    if result.status == EVENT_NOT_FOUND:
+        abort(404)
+
+    status_code, message, category = REGISTRATION_RESPONSES[result.status]
+    if request.is_json:
+        registration_id = result.registration.id if result.registration else None
+        return jsonify(status=result.status, registration_id=registration_id), status_code
+
+    flash(message, category)
+    return redirect(url_for('events.event_detail', event_id=event_id))
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+}
+
+
+@events_bp.route('/event/<int:event_id>/participants.<fmt>')
+@login_required
+def export_participants(event_id, fmt):
+    """Stream registrations and attendees without loading them all into memory."""
     ev = Event.query.get_or_404(event_id)
-    reg = Registration(
-        event_id=ev.id,
-        user_name=request.form.get('name'),
-        user_email=request.form.get('email')
+    if not can_manage_event(ev):
+        abort(403)
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+
+    stream, mimetype = EXPORT_FORMATS[fmt]
+    response = Response(stream_with_context(stream(ev.id)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=event-{ev.id}-participants.{fmt}'
+    response.cache_control.no_store = True
+    return response
+
+
+@events_bp.route('/event/<int:event_id>/registrations/import', methods=['POST'])
+@login_required
+def import_registrations_csv(event_id):
+    ev = Event.query.get_or_404(event_id)
+    if not can_manage_event(ev):
+        abort(403)
+
+    file = request.files.get('file')
+    if not file or not file.filename:
+        flash('Choose a CSV file with name and email columns', 'danger')
+        return redirect(url_for('events.event_detail', event_id=event_id))
+
+    lines = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+    try:
+        summary = import_registrations(ev.id, read_registration_csv(lines))
+    except ImportAborted as e:
+        db.session.rollback()
+        if e.summary['imported']:
+            page_cache.invalidate()
+        flash(
+            f"Could not read the whole CSV file ({e.error}). {e.summary['imported']} registrations "
+            f"read before the error were imported; fix the file and import it again to add the rest.",
+            'danger'
+        )
+        return redirect(url_for('events.event_detail', event_id=event_id))
+
+    # Core inserts bypass the ORM hooks that normally invalidate cached pages
+    page_cache.invalidate()
+    flash(
+        f"Imported {summary['imported']} registrations "
+        f"({summary['duplicates']} duplicates, {summary['over_capacity']} over capacity, "
+        f"{summary['invalid']} invalid rows skipped)",
+        'success'
     )
-    db.session.add(reg)
-    db.session.commit()
-    flash('Registered successfully', 'success')
     return redirect(url_for('events.event_detail', event_id=event_id))
 
+
 @events_bp.route('/event/<int:event_id>/delete', methods=['POST'])
 @login_required
 def delete_event(event_id):
@@ -84,6 +209,7 @@ def delete_event(event_id):
         return redirect(url_for('main.index'))
     
     event = Event.query.get_or_404(event_id)
+    queue_event_sync(event, DELETE)
     db.session.delete(event)
     db.session.commit()
     flash('Event deleted successfully.', 'success')
@@ -1,14 +1,17 @@
-from flask import Blueprint, render_template, redirect, url_for, current_app, flash, request
+from flask import Blueprint, render_template, redirect, url_for, current_app, flash, request, abort
 from flask_login import current_user, login_required
 from sqlalchemy.exc import OperationalError
 from ..models import Event, SiteConfig, db
 from ..forms import SiteConfigForm
+from ..cache import site_config_cache, page_cache
+from ..uploads import CONTENT_ADDRESSED, IMAGE_EXTENSIONS, save_image_upload, banner_url
+from ..search import KINDS, search as run_search
 from werkzeug.utils import secure_filename
-import os
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
+@page_cache.cached
 def index():
     """Homepage — show upcoming events and redirect logged-in users to their dashboard"""
     if current_user.is_authenticated:
@@ -23,10 +26,11 @@ def index():
         events = Event.query.order_by(Event.start_datetime).limit(5).all()
         site_config = SiteConfig.get_current()
         # Use a banner image instead of YouTube link
-        banner_image_url = getattr(site_config, 'banner_image', None) or url_for('static', filename='default_banner.jpg')
+        banner_image_url = banner_url(getattr(site_config, 'banner_image', None)) or url_for('static', filename='default_banner.jpg')
     except OperationalError as e:
         db_error = "⚠️ Cannot connect to database." if "getaddrinfo failed" in str(e) else str(e)
         current_app.logger.warning("Database issue: %s", e)
+        page_cache.skip()
     
     return render_template(
         'index.html',
@@ -43,23 +47,20 @@ def admin_settings():
         return redirect(url_for('main.index'))
 
     form = SiteConfigForm()
-    site_config = SiteConfig.get_current()
+    site_config = SiteConfig.get_or_create()
 
     if form.validate_on_submit():
         # If a new file is uploaded, it takes precedence
         if form.banner_file.data:
             file = form.banner_file.data
-            filename = secure_filename(file.filename)
-            # Make sure the uploads directory exists
-            upload_path = os.path.join(current_app.root_path, 'static', 'uploads')
-            os.makedirs(upload_path, exist_ok=True)
-            file.save(os.path.join(upload_path, filename))
-            site_config.banner_image = url_for('static', filename=f'uploads/{filename}')
+            filename = save_image_upload(file, secure_filename(file.filename))
+            site_config.banner_image = url_for('main.media', filename=filename)
         # Otherwise, use the URL field. If it's empty, it will clear the banner.
         else:
             site_config.banner_image = form.banner_url.data
 
         db.session.commit()
+        site_config_cache.invalidate()
         flash('Site configuration updated successfully!', 'success')
         return redirect(url_for('main.admin_settings'))
 
@@ -68,17 +69,47 @@ def admin_settings():
 
     return render_template('admin_settings.html', form=form)
 
+@main_bp.route('/media/<filename>')
+def media(filename):
+    """Serve a content-addressed upload; its name changes whenever its bytes do."""
+    if not CONTENT_ADDRESSED.match(filename) or not filename.endswith(IMAGE_EXTENSIONS):
+        abort(404)
+    storage = current_app.extensions['storage']
+    response = storage.send(filename, current_app.config['MEDIA_MAX_AGE'])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+@main_bp.route('/search')
+def search():
+    """Ranked full-text search over events, people and (for members) community posts"""
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('type')
+    page = min(max(request.args.get('page', 1, type=int), 1), current_app.config['SEARCH_MAX_PAGE'])
+
+    # Community posts are only visible to signed-in users
+    kinds = [k for k in KINDS if k != 'post' or current_user.is_authenticated]
+    if kind in kinds:
+        kinds = [kind]
+
+    results = run_search(query, kinds=kinds, page=page)
+    return render_template('search.html', query=query, kind=kind, results=results)
+
 @main_bp.route('/about')
+@page_cache.cached
 def about():
     """Simple About page"""
     return render_template('about.html')
 
 @main_bp.route('/contact')
+@page_cache.cached
 def contact():
     """Contact or feedback page"""
     return render_template('contact.html')
 
 @main_bp.route('/products')
+@page_cache.cached
 def products():
     """Products page."""
     return render_template('products.html')
@@ -1,9 +1,12 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
 from ..models import db, User
+from ..loaders import event_list_options
+from ..stats import annotate_event_counts
+from ..cache import user_cache
+from ..uploads import save_image_upload
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
-import os
-from datetime import datetime
 import traceback
 
 # ------------------------
@@ -19,15 +22,7 @@ def handle_profile_upload():
     if 'profile_picture' in request.files:
         file = request.files['profile_picture']
         if file and file.filename:
-            filename = secure_filename(file.filename)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{current_user.id}_{timestamp}_{filename}"
-            # Ensure upload folder exists
-            upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-            os.makedirs(upload_folder, exist_ok=True)
-            file_path = os.path.join(upload_folder, filename)
-            file.save(file_path)
-            return filename
+            return save_image_upload(file, secure_filename(file.filename))
     return None
 
 
@@ -57,9 +52,14 @@ def setup():
 
             current_user.profile_completed = True
             db.session.commit()  # Commit changes
+            user_cache.invalidate(current_user.id)
             flash('Profile updated successfully!', 'success')
             return redirect(url_for('profile.view', user_id=current_user.id))
 
+        except HTTPException:
+            db.session.rollback()
+            raise
+
         except Exception as e:
             db.session.rollback()  # Rollback if error occurs
             current_app.logger.error(f"Profile setup error: {e}")
@@ -92,32 +92,12 @@ def view(user_id):
                 current_app.logger.exception('Error converting relationship to list')
             return []
 
-        e_attending = _to_list(getattr(user, 'events_attending', []))
-        e_created = _to_list(getattr(user, 'events_created', []))
-
-        # Pre-compute attendees counts on each event so templates can safely
-        # render them without calling SQLAlchemy methods or using Python
-        # builtin functions (like hasattr) that Jinja may not expose.
-        def _attendees_count(ev):
-            try:
-                att = getattr(ev, 'attendees', None)
-                if att is None:
-                    return 0
-                # If SQLAlchemy dynamic relationship, it may have .count()
-                if hasattr(att, 'count') and callable(getattr(att, 'count')):
-                    return int(att.count())
-                # If it's iterable, return its length
-                if hasattr(att, '__len__'):
-                    return len(att)
-            except Exception:
-                current_app.logger.exception('Error getting attendees count for event id %s', getattr(ev, 'id', None))
-            return 0
+        e_attending = _to_list(user.events_attending.options(*event_list_options()))
+        e_created = _to_list(user.events_created.options(*event_list_options()))
 
-        for ev in e_attending + e_created:
-            try:
-                ev.attendees_count = _attendees_count(ev)
-            except Exception:
-                ev.attendees_count = 0
+        # Pre-compute attendee/registration counts for every listed event in
+        # one grouped query so the template never calls SQLAlchemy per event.
+        annotate_event_counts(e_attending + e_created)
 
         return render_template(
             'profile/view.html',
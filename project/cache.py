@@ -0,0 +1,224 @@
+# project/cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from .extensions import db
+
+
+# ------------------------
+# In-Process TTL Cache
+# ------------------------
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    Any object exposing the same ``get``/``set``/``delete`` methods can be used
+    in its place as a shared backend (e.g. a Redis adapter).
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _snapshot(obj):
+    """Copy an ORM instance's column values into a plain dict."""
+    return {attr.key: getattr(obj, attr.key) for attr in obj.__mapper__.column_attrs}
+
+
+# ------------------------
+# User Identity Cache
+# ------------------------
+class UserCache:
+    """
+    Cross-request cache for the Flask-Login ``user_loader``.
+
+    Flask-Login already memoises ``current_user`` for the rest of a request;
+    this cache removes the per-request ``SELECT users`` as well. Entries are
+    plain dicts of column values, re-attached to the session without a query.
+    Invalidation only reaches the local process, so ``USER_CACHE_TTL`` bounds
+    how stale another worker's copy can get.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.enabled = False
+
+    def init_app(self, app, backend=None):
+        ttl = app.config['USER_CACHE_TTL']
+        self.backend = backend or TTLCache(maxsize=app.config['USER_CACHE_MAX_SIZE'], ttl=ttl)
+        self.enabled = ttl > 0
+
+    def load(self, user_id):
+        from .models import User
+
+        data = self.backend.get(user_id) if self.enabled else None
+        if data is None:
+            user = User.query.get(user_id)
+            if user is not None and self.enabled:
+                self.backend.set(user_id, _snapshot(user))
+            return user
+
+        user = User(**data)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    def invalidate(self, user_id):
+        if self.backend is not None:
+            self.backend.delete(user_id)
+
+
+# ------------------------
+# Site Config Cache
+# ------------------------
+class SiteConfigCache:
+    """
+    Process-local copy of the singleton SiteConfig row.
+
+    Reads return a transient ``SiteConfig`` built from the cached values, so
+    the homepage issues no config query in steady state and never writes.
+    ``main.admin_settings`` invalidates on save; other workers pick up the
+    change once ``SITE_CONFIG_TTL`` expires.
+    """
+
+    KEY = 'site_config'
+
+    def __init__(self):
+        self.backend = None
+
+    def init_app(self, app):
+        self.backend = TTLCache(maxsize=1, ttl=app.config['SITE_CONFIG_TTL'])
+
+    def get(self):
+        from .models import SiteConfig
+
+        data = self.backend.get(self.KEY)
+        if data is None:
+            config = SiteConfig.query.get(1)
+            data = _snapshot(config) if config else {'id': 1}
+            self.backend.set(self.KEY, data)
+        return SiteConfig(**data)
+
+    def invalidate(self):
+        if self.backend is not None:
+            self.backend.delete(self.KEY)
+
+
+# ------------------------
+# Anonymous Page Cache
+# ------------------------
+class PageCache:
+    """
+    Rendered-response cache for pages that look the same to every anonymous
+    visitor. Responses carry an ETag so repeat visits can revalidate with a
+    304, and the whole cache is dropped whenever a commit touches one of the
+    models those pages render.
+    """
+
+    WATCHED_MODELS = ('Event', 'Registration', 'SiteConfig')
+
+    def __init__(self):
+        self.backend = None
+        self.enabled = False
+
+    def init_app(self, app):
+        ttl = app.config['PAGE_CACHE_TTL']
+        self.backend = TTLCache(maxsize=app.config['PAGE_CACHE_MAX_SIZE'], ttl=ttl)
+        self.enabled = ttl > 0
+
+    def invalidate(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def skip(self):
+        """Keep the current response out of the cache (e.g. error pages)."""
+        g.skip_page_cache = True
+
+    def cached(self, view):
+        """Decorator serving ``view`` from the cache for anonymous GETs."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if (not self.enabled or request.method != 'GET'
+                    or current_user.is_authenticated or session.get('_flashes')):
+                return view(*args, **kwargs)
+
+            key = request.full_path
+            entry = self.backend.get(key)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if (response.status_code != 200 or response.direct_passthrough
+                        or session.modified or g.get('skip_page_cache')):
+                    return response
+                body = response.get_data()
+                entry = (body, response.content_type, hashlib.sha1(body).hexdigest())
+                self.backend.set(key, entry)
+
+            body, content_type, etag = entry
+            response = current_app.response_class(body, content_type=content_type)
+            response.set_etag(etag)
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response.make_conditional(request)
+        return wrapper
+
+
+user_cache = UserCache()
+site_config_cache = SiteConfigCache()
+page_cache = PageCache()
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_page_cache_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if type(obj).__name__ in PageCache.WATCHED_MODELS:
+            session.info['page_cache_stale'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_page_cache(session):
+    if session.info.pop('page_cache_stale', False):
+        page_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_page_cache_changes(session):
+    session.info.pop('page_cache_stale', None)
@@ -0,0 +1,549 @@
+# project/calendar_sync.py
+import calendar
+import itertools
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from urllib.parse import urljoin
+
+from flask import current_app
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .jobs import job, job_queue
+from .models import CalendarChange, CalendarSyncState, Event, OAuthToken
+from .oauth_helpers import CALENDAR_SCOPE, update_token
+
+logger = logging.getLogger(__name__)
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+# Remote statuses that mean "this event is gone"
+_GONE = (404, 410)
+
+
+class CalendarAuthError(Exception):
+    """The access token was rejected (HTTP 401)."""
+
+
+class SyncTokenExpired(Exception):
+    """The stored sync token is no longer valid (HTTP 410); a full sync is needed."""
+
+
+class SyncInProgress(Exception):
+    """Another worker holds this user's sync lease; the job retries later."""
+
+
+class ReconnectRequired(Exception):
+    """The access token needs refreshing but no refresh token is stored."""
+
+
+class CalendarPushError(Exception):
+    """Some changes could not be pushed; they stay queued for the retry."""
+
+
+# ------------------------
+# Clients
+# ------------------------
+class CalendarClient(ABC):
+    """
+    The slice of the Calendar API the sync engine needs. ``token`` is a dict
+    shaped like OAuthToken.to_dict(); ``operations`` are dicts with a
+    ``method`` (insert, update or delete), an ``event_id`` and a ``body``.
+    """
+
+    @abstractmethod
+    def refresh(self, token):
+        """Return a new token dict for ``token``'s refresh token."""
+
+    @abstractmethod
+    def batch(self, token, calendar_id, operations):
+        """Send ``operations`` in one HTTP batch; return ``(status, body)`` per operation."""
+
+    @abstractmethod
+    def changes(self, token, calendar_id, sync_token=None):
+        """Return ``(items, next_sync_token)`` for everything changed since ``sync_token``."""
+
+
+class GoogleCalendarClient(CalendarClient):
+    """
+    Google Calendar v3 through google-api-python-client. ``api_url`` points
+    it at a local emulator instead of googleapis.com.
+    """
+
+    def __init__(self, client_id, client_secret, token_url, api_url=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_url = token_url
+        self.api_url = api_url
+        self.batch_url = urljoin(api_url or 'https://www.googleapis.com/', '/batch/calendar/v3')
+
+    def _service(self, token):
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build
+
+        return build(
+            'calendar', 'v3',
+            credentials=Credentials(token['access_token']),
+            cache_discovery=False,
+            static_discovery=True,
+            client_options={'api_endpoint': self.api_url} if self.api_url else None
+        )
+
+    @staticmethod
+    def _status(error):
+        from googleapiclient.errors import HttpError
+        return int(error.resp.status) if isinstance(error, HttpError) else 0
+
+    def refresh(self, token):
+        import google_auth_httplib2
+        import httplib2
+        from google.oauth2.credentials import Credentials
+
+        credentials = Credentials(
+            None,
+            refresh_token=token['refresh_token'],
+            token_uri=self.token_url,
+            client_id=self.client_id,
+            client_secret=self.client_secret
+        )
+        credentials.refresh(google_auth_httplib2.Request(httplib2.Http()))
+        return {
+            'access_token': credentials.token,
+            'refresh_token': credentials.refresh_token or token['refresh_token'],
+            'expires_at': calendar.timegm(credentials.expiry.utctimetuple()),
+            'scope': token.get('scope'),
+        }
+
+    def batch(self, token, calendar_id, operations):
+        from googleapiclient.errors import HttpError
+        from googleapiclient.http import BatchHttpRequest
+
+        events = self._service(token).events()
+        results = [None] * len(operations)
+
+        def collect(request_id, response, error):
+            results[int(request_id)] = (200, response) if error is None else (self._status(error), None)
+
+        request = BatchHttpRequest(callback=collect, batch_uri=self.batch_url)
+        for index, op in enumerate(operations):
+            if op['method'] == 'insert':
+                call = events.insert(calendarId=calendar_id, body=op['body'])
+            elif op['method'] == 'update':
+                call = events.update(calendarId=calendar_id, eventId=op['event_id'], body=op['body'])
+            else:
+                call = events.delete(calendarId=calendar_id, eventId=op['event_id'])
+            request.add(call, request_id=str(index))
+        try:
+            request.execute()
+        except HttpError as e:
+            if self._status(e) == 401:
+                raise CalendarAuthError() from e
+            raise
+        if any(status == 401 for status, _ in results):
+            raise CalendarAuthError()
+        return results
+
+    def changes(self, token, calendar_id, sync_token=None):
+        from googleapiclient.errors import HttpError
+
+        events = self._service(token).events()
+        items, page_token = [], None
+        while True:
+            params = {
+                'calendarId': calendar_id,
+                'showDeleted': True,
+                'maxResults': 2500,
+                'fields': 'items(id,status),nextPageToken,nextSyncToken',
+            }
+            if sync_token:
+                params['syncToken'] = sync_token
+            if page_token:
+                params['pageToken'] = page_token
+            try:
+                response = events.list(**params).execute()
+            except HttpError as e:
+                if self._status(e) == 410:
+                    raise SyncTokenExpired() from e
+                if self._status(e) == 401:
+                    raise CalendarAuthError() from e
+                raise
+            items.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items, response.get('nextSyncToken')
+
+
+class FakeCalendarClient(CalendarClient):
+    """
+    In-memory Calendar API for tests and local development. Each account is
+    told apart by its refresh token. Call ``reject_token``,
+    ``expire_sync_tokens`` or ``fail_next`` to simulate revoked access, a
+    410 Gone or a transient server error.
+    """
+
+    def __init__(self):
+        self.calendars = {}
+        self.batches = []
+        self.refreshes = 0
+        self._log = {}
+        self._rejected = set()
+        self._oldest_sync = {}
+        self._failures = []
+        self._tokens = itertools.count(1)
+
+    def _calendar(self, token, calendar_id):
+        if token['access_token'] in self._rejected:
+            raise CalendarAuthError()
+        key = (token.get('refresh_token'), calendar_id)
+        self._log.setdefault(key, [])
+        return key, self.calendars.setdefault(key, {})
+
+    def reject_token(self, access_token):
+        self._rejected.add(access_token)
+
+    def expire_sync_tokens(self):
+        for key, log in self._log.items():
+            self._oldest_sync[key] = len(log)
+
+    def fail_next(self, times=1, status=503):
+        """Answer the next ``times`` operations with ``status`` instead of applying them."""
+        self._failures.extend([status] * times)
+
+    def refresh(self, token):
+        self.refreshes += 1
+        return dict(
+            token,
+            access_token=f"fake-access-{next(self._tokens)}",
+            expires_at=int(time.time()) + 3600
+        )
+
+    def batch(self, token, calendar_id, operations):
+        key, events = self._calendar(token, calendar_id)
+        self.batches.append(len(operations))
+        results = []
+        for op in operations:
+            event_id = op['event_id']
+            current = events.get(event_id)
+            if self._failures:
+                results.append((self._failures.pop(0), None))
+            elif op['method'] == 'insert' and current is not None:
+                results.append((409, None))
+            elif current is None and op['method'] != 'insert':
+                results.append((404, None))
+            elif op['method'] == 'delete' and current['status'] == 'cancelled':
+                results.append((410, None))
+            else:
+                event = {'status': 'cancelled'} if op['method'] == 'delete' else dict(op['body'], status='confirmed')
+                events[event_id] = dict(event, id=event_id)
+                self._log[key].append(event_id)
+                results.append((200, None if op['method'] == 'delete' else events[event_id]))
+        return results
+
+    def changes(self, token, calendar_id, sync_token=None):
+        key, events = self._calendar(token, calendar_id)
+        log = self._log[key]
+        since = int(sync_token) if sync_token else 0
+        if sync_token and since < self._oldest_sync.get(key, 0):
+            raise SyncTokenExpired()
+        changed = dict.fromkeys(log[since:]) if sync_token else events
+        return [{'id': event_id, 'status': events[event_id]['status']} for event_id in changed], str(len(log))
+
+
+def init_calendar_sync(app):
+    """Create the configured Calendar client, if any, and register it on ``app``."""
+    backend = app.config['CALENDAR_SYNC_BACKEND']
+    if not backend:
+        return None
+    if backend == 'google':
+        client = GoogleCalendarClient(
+            client_id=app.config['GOOGLE_CLIENT_ID'],
+            client_secret=app.config['GOOGLE_CLIENT_SECRET'],
+            token_url=app.config['GOOGLE_TOKEN_URL'],
+            api_url=app.config['GOOGLE_CALENDAR_API_URL']
+        )
+    elif backend == 'fake':
+        client = FakeCalendarClient()
+    else:
+        raise ValueError(f"Unknown CALENDAR_SYNC_BACKEND: {backend!r}")
+    app.extensions['calendar'] = client
+    return client
+
+
+def get_client():
+    return current_app.extensions.get('calendar')
+
+
+# ------------------------
+# Queueing Changes
+# ------------------------
+def calendar_event_id(event):
+    """
+    The id an event gets in Google Calendar. Choosing it ourselves makes an
+    insert whose response was lost safe to retry: the retry gets a 409.
+    Calendar ids are base32hex (0-9, a-v).
+    """
+    created = int(calendar.timegm(event.created_at.utctimetuple())) if event.created_at else 0
+    return f"ev{event.id}c{created}"
+
+
+def queue_event_sync(event, action=UPSERT):
+    """
+    Record that ``event`` changed and schedule a sync for its creator.
+
+    Call it before committing the change itself (the event must have an
+    id, so flush new events first): the change row is written in the same
+    transaction and the sync job only starts once it commits, so the
+    request never waits on Google.
+    """
+    if get_client() is None or event.created_by is None:
+        return
+    db.session.add(CalendarChange(
+        user_id=event.created_by,
+        event_id=event.id,
+        action=action,
+        calendar_event_id=event.calendar_event_id or calendar_event_id(event)
+    ))
+    job_queue.enqueue(sync_user_calendar, event.created_by)
+
+
+def resume_sync(user_id):
+    """Schedule a sync if ``user_id`` has changes waiting (e.g. after a fresh sign-in)."""
+    if get_client() is None:
+        return
+    if db.session.query(CalendarChange.id).filter_by(user_id=user_id).first() is not None:
+        job_queue.enqueue(sync_user_calendar, user_id)
+    # Ends the read (and dispatches the job, which waits for a commit)
+    db.session.commit()
+
+
+# ------------------------
+# Sync Engine
+# ------------------------
+def _event_body(event, event_id):
+    timezone = current_app.config['CALENDAR_TIMEZONE']
+    return {
+        'id': event_id,
+        'status': 'confirmed',
+        'summary': event.title,
+        'description': event.description or '',
+        'location': event.meet_link or '',
+        'start': {'dateTime': event.start_datetime.isoformat(), 'timeZone': timezone},
+        'end': {'dateTime': event.end_datetime.isoformat(), 'timeZone': timezone},
+        'extendedProperties': {'private': {'event_id': str(event.id)}},
+    }
+
+
+def _token_dict(token):
+    return {
+        'access_token': token.access_token,
+        'refresh_token': token.refresh_token,
+        'expires_at': token.expires_at,
+        'scope': token.scope,
+    }
+
+
+def _refresh(client, user_id, token):
+    if not token['refresh_token']:
+        raise ReconnectRequired()
+    token = client.refresh(token)
+    update_token('google', token, user_id=user_id)
+    return token
+
+
+def _acquire(user_id):
+    """Take the user's sync lease so two workers never push the same changes."""
+    now = datetime.utcnow()
+    if db.session.get(CalendarSyncState, user_id) is None:
+        db.session.add(CalendarSyncState(user_id=user_id))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+    lease = timedelta(seconds=current_app.config['CALENDAR_SYNC_LEASE_SECONDS'])
+    taken = db.session.execute(
+        update(CalendarSyncState)
+        .where(CalendarSyncState.user_id == user_id)
+        .where(or_(CalendarSyncState.locked_until.is_(None), CalendarSyncState.locked_until < now))
+        .values(locked_until=now + lease)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return bool(taken)
+
+
+def _release(user_id):
+    db.session.rollback()
+    db.session.execute(
+        update(CalendarSyncState)
+        .where(CalendarSyncState.user_id == user_id)
+        .values(locked_until=None, last_synced_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _pull(client, user_id, token, calendar_id):
+    """
+    Apply what changed on Google since the last sync. Events the organizer
+    deleted from their calendar are unlinked, so later edits re-create them
+    instead of failing on a missing event.
+    """
+    state = db.session.get(CalendarSyncState, user_id)
+    try:
+        items, next_token = client.changes(token, calendar_id, state.sync_token)
+    except SyncTokenExpired:
+        logger.info('Sync token for user %s expired; running a full sync', user_id)
+        items, next_token = client.changes(token, calendar_id, None)
+
+    cancelled = [item['id'] for item in items if item.get('status') == 'cancelled']
+    for start in range(0, len(cancelled), 500):
+        db.session.execute(
+            update(Event)
+            .where(Event.created_by == user_id, Event.calendar_event_id.in_(cancelled[start:start + 500]))
+            .values(calendar_event_id=None)
+            .execution_options(synchronize_session=False)
+        )
+    state.sync_token = next_token
+    db.session.commit()
+
+
+def _operation(change, event):
+    """Map a coalesced change to a Calendar call, or None if there is nothing to send."""
+    if change.action == DELETE:
+        return {'method': 'delete', 'event_id': change.calendar_event_id, 'body': None}
+    if event is None:
+        return None
+    if event.calendar_event_id:
+        return {'method': 'update', 'event_id': event.calendar_event_id,
+                'body': _event_body(event, event.calendar_event_id)}
+    return {'method': 'insert', 'event_id': change.calendar_event_id,
+            'body': _event_body(event, change.calendar_event_id)}
+
+
+def _push_page(client, token, calendar_id, changes):
+    """Push one page of queued changes; returns the event ids that failed."""
+    batch_size = current_app.config['CALENDAR_BATCH_SIZE']
+
+    # Several edits to one event collapse into its latest state
+    latest = {}
+    for change in changes:
+        latest[change.event_id] = change
+    upserts = [event_id for event_id, change in latest.items() if change.action == UPSERT]
+    events = {event.id: event for event in Event.query.filter(Event.id.in_(upserts))} if upserts else {}
+    pending = [
+        (change, op) for change in latest.values()
+        for op in [_operation(change, events.get(change.event_id))] if op
+    ]
+
+    failed = set()
+    for _ in range(3):
+        retry = []
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            results = client.batch(token, calendar_id, [op for _, op in chunk])
+            for (change, op), (status, _body) in zip(chunk, results):
+                event = events.get(change.event_id) if change.action == UPSERT else None
+                if 200 <= status < 300:
+                    if event is not None:
+                        event.calendar_event_id = op['event_id']
+                elif op['method'] == 'insert' and status == 409:
+                    # Created by an earlier attempt whose response was lost
+                    event.calendar_event_id = op['event_id']
+                    retry.append((change, _operation(change, event)))
+                elif op['method'] == 'update' and status in _GONE:
+                    # Purged from the calendar: create it again
+                    event.calendar_event_id = None
+                    retry.append((change, _operation(change, event)))
+                elif op['method'] == 'delete' and status in _GONE:
+                    pass
+                else:
+                    logger.warning('Calendar %s of event %s failed with HTTP %s', op['method'], change.event_id, status)
+                    failed.add(change.event_id)
+        if not retry:
+            break
+        pending = retry
+    else:
+        failed.update(change.event_id for change, _ in pending)
+    return failed
+
+
+def _push(client, user_id, token, calendar_id):
+    """Send every queued change for ``user_id`` in batches; returns the number of failures."""
+    page_size = current_app.config['CALENDAR_BATCH_SIZE'] * 10
+    last_id, failures = 0, 0
+    while True:
+        changes = (
+            CalendarChange.query
+            .filter(CalendarChange.user_id == user_id, CalendarChange.id > last_id)
+            .order_by(CalendarChange.id)
+            .limit(page_size)
+            .all()
+        )
+        if not changes:
+            return failures
+        last_id = changes[-1].id
+        failed = _push_page(client, token, calendar_id, changes)
+        failures += len(failed)
+
+        # The page is settled except for its failures, which stay queued for the retry
+        settled = delete(CalendarChange).where(
+            CalendarChange.user_id == user_id, CalendarChange.id.in_([change.id for change in changes])
+        )
+        if failed:
+            settled = settled.where(CalendarChange.event_id.notin_(failed))
+        db.session.execute(settled)
+        db.session.commit()
+
+
+@job(max_attempts=8)
+def sync_user_calendar(user_id):
+    """
+    Background job: bring ``user_id``'s Google Calendar up to date.
+
+    Pulls remote changes incrementally with the stored sync token (a full
+    listing only when Google expires it), then pushes queued event changes
+    in batched HTTP requests. An expiring or rejected access token is
+    refreshed and saved through oauth_helpers.update_token.
+    """
+    client = get_client()
+    if client is None:
+        return
+
+    token = OAuthToken.query.filter_by(name='google', user_id=user_id).first()
+    connected = token is not None and (token.access_token or token.refresh_token)
+    if connected and current_app.config['CALENDAR_SYNC_BACKEND'] == 'google':
+        connected = CALENDAR_SCOPE in (token.scope or '')
+    if not connected:
+        # The organizer never granted calendar access; nothing to push to
+        db.session.execute(delete(CalendarChange).where(CalendarChange.user_id == user_id))
+        db.session.commit()
+        return
+
+    if not _acquire(user_id):
+        raise SyncInProgress(f"Calendar sync already running for user {user_id}")
+    try:
+        calendar_id = current_app.config['GOOGLE_CALENDAR_ID']
+        token_data = _token_dict(token)
+        if not token_data['access_token'] or (token_data['expires_at'] or 0) < time.time() + 60:
+            token_data = _refresh(client, user_id, token_data)
+        try:
+            _pull(client, user_id, token_data, calendar_id)
+            failures = _push(client, user_id, token_data, calendar_id)
+        except CalendarAuthError:
+            db.session.rollback()
+            token_data = _refresh(client, user_id, token_data)
+            _pull(client, user_id, token_data, calendar_id)
+            failures = _push(client, user_id, token_data, calendar_id)
+    except ReconnectRequired:
+        # Retrying can't help; the changes wait for the next Google sign-in
+        logger.warning('No Google refresh token for user %s; calendar sync paused until they sign in again', user_id)
+        return
+    finally:
+        _release(user_id)
+
+    if failures:
+        raise CalendarPushError(f"{failures} calendar change(s) for user {user_id} will be retried")
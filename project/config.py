@@ -4,6 +4,36 @@ from dotenv import load_dotenv
 load_dotenv(override=True)
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def engine_options(database_uri):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for the given database from the environment."""
+    if not database_uri.startswith("postgresql"):
+        # SQLite keeps SQLAlchemy's defaults; there is no network to pool.
+        return {}
+
+    if os.getenv("DB_PGBOUNCER", "0") == "1":
+        # PgBouncer owns the pooling: hand connections straight back to it and
+        # skip startup parameters (like statement_timeout) it would reject.
+        # Set the statement timeout on the database role instead.
+        from sqlalchemy.pool import NullPool
+        return {"poolclass": NullPool}
+
+    options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        # Recycle before the server/load balancer silently drops idle TLS connections
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+    }
+
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    if statement_timeout > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+
+    return options
+
+
 class Config:
     # -----------------------------
     # General Config
@@ -33,6 +63,7 @@ class Config:
         SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(basedir, '..', 'dev.db')}"
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
 
 
     # -----------------------------
@@ -71,3 +102,135 @@ class Config:
     # Uploads
     # -----------------------------
     UPLOAD_FOLDER = os.path.join(basedir, "static", "uploads")
+    # Each uploaded file is capped while it is streamed into storage
+    UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+    # Whole request bodies (files plus form fields) are capped while parsing
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(UPLOAD_MAX_BYTES + 1024 * 1024)))
+    # Content-addressed uploads never change, so browsers may keep them for a year
+    MEDIA_MAX_AGE = int(os.getenv("MEDIA_MAX_AGE", str(365 * 24 * 3600)))
+
+    # -----------------------------
+    # Static Assets
+    # -----------------------------
+    # Fingerprinted build output (see build_assets.py) is cached for a year
+    STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", str(365 * 24 * 3600)))
+    # Apache mod_xsendfile / lighttpd: send files via an X-Sendfile header
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "0") == "1"
+    # nginx: internal location aliased to project/static, e.g. "/_static/"
+    STATIC_ACCEL_REDIRECT = os.getenv("STATIC_ACCEL_REDIRECT")
+
+    # -----------------------------
+    # Instrumentation
+    # -----------------------------
+    INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "1") == "1"
+    # Level of the "project.*" loggers (start-up settings, job retries, request lines)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    # Server-Timing exposes timings to browsers; disable if that is unwanted
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") == "1"
+    # One JSON line per request on the "project.instrumentation" logger
+    REQUEST_LOG_ENABLED = os.getenv("REQUEST_LOG_ENABLED", "1") == "1"
+    # /metrics is open to admins, and to loopback requests when this is set
+    METRICS_ALLOW_LOCALHOST = os.getenv("METRICS_ALLOW_LOCALHOST", "1") == "1"
+
+    # Statements slower than this are written to the slow-query log
+    SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG_ENABLED", "1") == "1"
+    SLOW_QUERY_THRESHOLD_MS = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+    # Flag a statement run more than this many times in one request (N+1)
+    DUPLICATE_QUERY_THRESHOLD = int(os.getenv("DUPLICATE_QUERY_THRESHOLD", "5"))
+    SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", os.path.join(basedir, "..", "logs", "slow_queries.log"))
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+    SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "3"))
+
+    # -----------------------------
+    # Upload Storage
+    # -----------------------------
+    # "local" keeps blobs in UPLOAD_FOLDER; "s3" uses any S3-compatible store
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+    S3_BUCKET = os.getenv("S3_BUCKET")
+    S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # e.g. http://localhost:9000 for MinIO
+    S3_REGION = os.getenv("S3_REGION")
+    S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
+    S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY")
+    # Optional CDN or public bucket URL; blobs are proxied through /media otherwise
+    S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")
+
+    # -----------------------------
+    # Community Feed
+    # -----------------------------
+    FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", "20"))
+    # Comments fetched per page when a post's thread is expanded
+    COMMENT_PAGE_SIZE = int(os.getenv("COMMENT_PAGE_SIZE", "20"))
+    # Like counts are buffered per process and flushed in batches; 0 writes through
+    LIKE_FLUSH_INTERVAL = float(os.getenv("LIKE_FLUSH_INTERVAL", "2"))
+    # Flush early once this many posts have unflushed likes
+    LIKE_FLUSH_MAX_PENDING = int(os.getenv("LIKE_FLUSH_MAX_PENDING", "500"))
+    # Precomputed feed timeline: "" queries posts directly, "sql" keeps it in the
+    # timeline_entry table, "memory" is a per-process stand-in for tests
+    TIMELINE_BACKEND = os.getenv("TIMELINE_BACKEND", "")
+    # Newest posts kept per timeline; older feed pages query posts directly
+    TIMELINE_MAX_LENGTH = int(os.getenv("TIMELINE_MAX_LENGTH", "1000"))
+    # Seconds before a timeline is rebuilt from posts anyway, picking up posts
+    # inserted outside the app (seeds, imports); 0 disables
+    TIMELINE_REBUILD_AFTER = int(os.getenv("TIMELINE_REBUILD_AFTER", "3600"))
+
+    # -----------------------------
+    # Events
+    # -----------------------------
+    # Registrants fetched per "load more" on an event page (organizers only)
+    REGISTRANT_PAGE_SIZE = int(os.getenv("REGISTRANT_PAGE_SIZE", "50"))
+    # Rows per page of the admin dashboard's event and post tables
+    ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", "25"))
+    # Upcoming events listed beside the community feed
+    FEED_UPCOMING_EVENTS = int(os.getenv("FEED_UPCOMING_EVENTS", "5"))
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+    # Deep offsets get slower; nobody pages this far through ranked results
+    SEARCH_MAX_PAGE = int(os.getenv("SEARCH_MAX_PAGE", "50"))
+
+    # -----------------------------
+    # Background Jobs
+    # -----------------------------
+    # "thread" or "process" pool in each web process, "sql" for the durable job
+    # table drained by run_worker.py, "sync" to run inline (tests, scripts)
+    JOBS_BACKEND = os.getenv("JOBS_BACKEND", "thread")
+    JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+    JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+    # Retry delays double from the base up to the max, with jitter
+    JOBS_RETRY_BASE_DELAY = float(os.getenv("JOBS_RETRY_BASE_DELAY", "5"))
+    JOBS_RETRY_MAX_DELAY = float(os.getenv("JOBS_RETRY_MAX_DELAY", "600"))
+    JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1"))
+    # A job still running after this long is assumed lost and runs again
+    JOBS_LEASE_SECONDS = int(os.getenv("JOBS_LEASE_SECONDS", "600"))
+
+    # -----------------------------
+    # Calendar Sync
+    # -----------------------------
+    # "google" pushes organizers' events to their Google Calendar (and asks for
+    # the calendar scope at sign-in), "fake" keeps them in memory; empty is off
+    CALENDAR_SYNC_BACKEND = os.getenv("CALENDAR_SYNC_BACKEND", "")
+    GOOGLE_CALENDAR_ID = os.getenv("GOOGLE_CALENDAR_ID", "primary")
+    # Base URL of a Calendar API emulator (including its /calendar/v3/ path)
+    # to use instead of googleapis.com
+    GOOGLE_CALENDAR_API_URL = os.getenv("GOOGLE_CALENDAR_API_URL")
+    GOOGLE_TOKEN_URL = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+    # Google accepts up to 1000 calls per batch but throttles large ones
+    CALENDAR_BATCH_SIZE = int(os.getenv("CALENDAR_BATCH_SIZE", "50"))
+    CALENDAR_TIMEZONE = os.getenv("CALENDAR_TIMEZONE", "UTC")
+    CALENDAR_SYNC_LEASE_SECONDS = int(os.getenv("CALENDAR_SYNC_LEASE_SECONDS", "300"))
+
+    # -----------------------------
+    # Caching
+    # -----------------------------
+    # Seconds a logged-in user's row is reused across requests (0 disables)
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+    USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    # Seconds before another worker's banner change becomes visible here
+    SITE_CONFIG_TTL = int(os.getenv("SITE_CONFIG_TTL", "300"))
+    # Seconds an anonymous page render is reused (0 disables)
+    PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "60"))
+    PAGE_CACHE_MAX_SIZE = int(os.getenv("PAGE_CACHE_MAX_SIZE", "512"))
+    # Seconds the feed's post and user totals are reused (0 disables)
+    COMMUNITY_STATS_TTL = int(os.getenv("COMMUNITY_STATS_TTL", "60"))
@@ -0,0 +1,85 @@
+# project/exports.py
+import csv
+import io
+import json
+
+from sqlalchemy import literal, select, union_all
+
+from .models import db, Registration, User, event_attendees
+
+EXPORT_FIELDS = ('source', 'name', 'email', 'registered_at')
+
+# Rows fetched per round trip; with yield_per SQLAlchemy asks the driver
+# for a server-side cursor, so memory stays flat however long the list is.
+EXPORT_BATCH_SIZE = 1000
+
+# Cells starting with these are treated as formulas by spreadsheet apps
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def participant_rows_query(event_id):
+    """Registrations and signed-in attendees of an event as one ordered result."""
+    registrations = select(
+        literal('registration').label('source'),
+        Registration.user_name.label('name'),
+        Registration.user_email.label('email'),
+        Registration.created_at.label('registered_at'),
+    ).where(Registration.event_id == event_id)
+
+    attendees = select(
+        literal('attendee').label('source'),
+        User.name.label('name'),
+        User.email.label('email'),
+        event_attendees.c.registered_at.label('registered_at'),
+    ).join(User, User.id == event_attendees.c.user_id).where(event_attendees.c.event_id == event_id)
+
+    combined = union_all(registrations, attendees).subquery()
+    return select(combined).order_by(combined.c.registered_at)
+
+
+def _iter_rows(event_id):
+    result = db.session.execute(
+        participant_rows_query(event_id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    value = str(value)
+    if value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(event_id):
+    """Yield the event's participant list as CSV text, one batch at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for partition in _iter_rows(event_id):
+        writer.writerows([_csv_cell(value) for value in row] for row in partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def stream_ndjson(event_id):
+    """Yield the event's participant list as newline-delimited JSON."""
+    for partition in _iter_rows(event_id):
+        yield ''.join(
+            json.dumps({field: value for field, value in zip(EXPORT_FIELDS, row)}, default=_json_default) + '\n'
+            for row in partition
+        )
@@ -0,0 +1,123 @@
+# project/feed.py
+import base64
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from .loaders import comment_options, feed_post_options
+from .models import Comment, Post
+from .timeline import AUDIENCE_PUBLIC, ensure_built, get_timeline
+
+
+# ------------------------
+# Cursor Helpers
+# ------------------------
+def encode_cursor(row):
+    """Build an opaque cursor pointing just after ``row`` (a post or comment)."""
+    return _encode_key(row.created_at, row.id)
+
+
+def _encode_key(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, id)`` for a cursor, raising ValueError if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+# ------------------------
+# Feed Query
+# ------------------------
+def get_feed_page(cursor=None, page_size=None):
+    """
+    Fetch one page of the community feed ordered by ``(created_at, id)`` desc.
+
+    Returns ``(posts, next_cursor)``; ``next_cursor`` is None on the last page.
+    Seeking on the key instead of OFFSET keeps every page equally cheap.
+    """
+    page_size = page_size or current_app.config['FEED_PAGE_SIZE']
+
+    store = get_timeline()
+    if store is not None:
+        page = _timeline_page(store, cursor, page_size)
+        if page is not None:
+            return page
+
+    query = Post.query.options(*feed_post_options())
+
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Post.created_at < created_at,
+            and_(Post.created_at == created_at, Post.id < post_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    posts = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(posts) > page_size:
+        posts = posts[:page_size]
+        next_cursor = encode_cursor(posts[-1])
+
+    return posts, next_cursor
+
+
+def _timeline_page(store, cursor, page_size):
+    """
+    Serve a feed page from the precomputed timeline: slice the ids, then
+    hydrate them in one ``IN`` query. Returns None when the page reaches the
+    end of the bounded timeline (older posts may have been trimmed from it),
+    so the caller queries posts instead.
+    """
+    ensure_built(store, AUDIENCE_PUBLIC)
+    entries = store.page(AUDIENCE_PUBLIC, decode_cursor(cursor) if cursor else None, page_size + 1)
+    if len(entries) <= page_size:
+        return None
+
+    entries = entries[:page_size]
+    ids = [post_id for _, post_id in entries]
+    loaded = {post.id: post for post in Post.query.options(*feed_post_options()).filter(Post.id.in_(ids))}
+    next_cursor = _encode_key(*entries[-1])
+
+    # Posts deleted since they were published simply drop out of the page
+    return [loaded[post_id] for _, post_id in entries if post_id in loaded], next_cursor
+
+
+# ------------------------
+# Comment Threads
+# ------------------------
+def get_comment_page(post_id, cursor=None, page_size=None):
+    """
+    Fetch one page of a post's comments, oldest first by ``(created_at, id)``.
+
+    Returns ``(comments, next_cursor)`` like get_feed_page; the seek runs on
+    the (post_id, created_at) index however long the thread is.
+    """
+    page_size = page_size or current_app.config['COMMENT_PAGE_SIZE']
+
+    query = Comment.query.options(*comment_options()).filter(Comment.post_id == post_id)
+
+    if cursor:
+        created_at, comment_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Comment.created_at > created_at,
+            and_(Comment.created_at == created_at, Comment.id > comment_id)
+        ))
+
+    comments = query.order_by(Comment.created_at, Comment.id).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(comments) > page_size:
+        comments = comments[:page_size]
+        next_cursor = encode_cursor(comments[-1])
+
+    return comments, next_cursor
@@ -0,0 +1,229 @@
+# project/instrumentation.py
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from flask import (
+    Response, abort, before_render_template, current_app, g, has_request_context, request, template_rendered
+)
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Callables invoked as ``listener(statement, elapsed)`` after every SQL statement
+query_listeners = []
+
+
+class RequestStats:
+    """Timings collected while a single request is handled."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self._render_starts = []
+
+
+def current_stats():
+    """The RequestStats of the active request, or None outside one."""
+    if has_request_context():
+        return g.get('_request_stats')
+    return None
+
+
+# ------------------------
+# Metric Registry
+# ------------------------
+class Metrics:
+    """
+    Per-process totals keyed by endpoint, rendered in the Prometheus text
+    format. Every gunicorn worker keeps its own registry, so scrape each
+    worker or sum across them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}        # (endpoint, method, status) -> count
+        self.endpoints = {}       # endpoint -> [count, seconds, sql count, sql seconds, render seconds]
+        self.latency = {}         # endpoint -> per-bucket counts (last is +Inf)
+
+    def observe(self, endpoint, method, status, stats, duration):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            totals = self.endpoints.setdefault(endpoint, [0, 0.0, 0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += stats.sql_count
+            totals[3] += stats.sql_time
+            totals[4] += stats.render_time
+
+            buckets = self.latency.setdefault(endpoint, [0] * (len(LATENCY_BUCKETS) + 1))
+            buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+
+    def render(self):
+        with self._lock:
+            requests = dict(self.requests)
+            endpoints = {k: list(v) for k, v in self.endpoints.items()}
+            latency = {k: list(v) for k, v in self.latency.items()}
+
+        lines = [
+            '# HELP http_requests_total Requests handled, by endpoint, method and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP http_request_duration_seconds Request latency, by endpoint.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for endpoint, buckets in sorted(latency.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {endpoints[endpoint][1]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{endpoint="{endpoint}"}} {cumulative}')
+
+        for name, index, kind, help_text in (
+            ('db_queries_total', 2, 'counter', 'SQL statements executed, by endpoint.'),
+            ('db_query_seconds_total', 3, 'counter', 'Time spent executing SQL, by endpoint.'),
+            ('template_render_seconds_total', 4, 'counter', 'Time spent rendering templates, by endpoint.'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for endpoint, totals in sorted(endpoints.items()):
+                value = totals[index]
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {value if index == 2 else f"{value:.6f}"}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# ------------------------
+# Flask Extension
+# ------------------------
+class Instrumentation:
+    """
+    Records query count, query time, template render time and total latency
+    for every request. Results go out as a ``Server-Timing`` header, a JSON
+    log line on the ``project.instrumentation`` logger and Prometheus metrics
+    on ``/metrics``.
+    """
+
+    def __init__(self):
+        self.metrics = Metrics()
+        self.server_timing = False
+        self.request_log = False
+
+    def init_app(self, app):
+        if not app.config['INSTRUMENTATION_ENABLED']:
+            return
+        self.server_timing = app.config['SERVER_TIMING_ENABLED']
+        self.request_log = app.config['REQUEST_LOG_ENABLED']
+        self.allow_localhost = app.config['METRICS_ALLOW_LOCALHOST']
+        if self.request_log:
+            # Request lines are INFO; don't let a quieter root logger drop them
+            logger.setLevel(logging.INFO)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._finish_render, app)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        app.extensions['instrumentation'] = self
+
+    def _start_request(self):
+        g._request_stats = RequestStats()
+
+    def _start_render(self, sender, template, context, **extra):
+        stats = current_stats()
+        if stats is not None:
+            stats._render_starts.append(time.perf_counter())
+
+    def _finish_render(self, sender, template, context, **extra):
+        stats = current_stats()
+        if stats is not None and stats._render_starts:
+            stats.render_time += time.perf_counter() - stats._render_starts.pop()
+
+    def _finish_request(self, response):
+        stats = current_stats()
+        if stats is None:
+            return response
+        duration = time.perf_counter() - stats.start
+        endpoint = request.endpoint or 'unmatched'
+
+        self.metrics.observe(endpoint, request.method, response.status_code, stats, duration)
+
+        if self.server_timing:
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries", '
+                f'render;dur={stats.render_time * 1000:.1f}, '
+                f'total;dur={duration * 1000:.1f}'
+            )
+
+        if self.request_log and endpoint != 'static':
+            logger.info(json.dumps({
+                'event': 'request',
+                'endpoint': endpoint,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'sql_count': stats.sql_count,
+                'sql_ms': round(stats.sql_time * 1000, 2),
+                'render_ms': round(stats.render_time * 1000, 2),
+            }))
+        return response
+
+    def _metrics_allowed(self):
+        if current_user.is_authenticated and current_user.role == current_app.config['ROLES']['ADMIN']:
+            return True
+        # Requests relayed by a local reverse proxy also arrive from loopback,
+        # so only trust loopback when no proxy forwarded the request.
+        return (self.allow_localhost
+                and request.remote_addr in ('127.0.0.1', '::1')
+                and 'X-Forwarded-For' not in request.headers)
+
+    def metrics_view(self):
+        if not self._metrics_allowed():
+            abort(403)
+        return Response(self.metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+instrumentation = Instrumentation()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_time += elapsed
+    for listener in query_listeners:
+        listener(statement, elapsed)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _discard_failed_query(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
@@ -0,0 +1,332 @@
+# project/jobs.py
+import importlib
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job row states (sql backend). Succeeded jobs are deleted; failed ones stay
+# behind with their last error for inspection.
+QUEUED = 'queued'
+RUNNING = 'running'
+FAILED = 'failed'
+
+# Session.info key for jobs enqueued in the current transaction; pool jobs
+# are dispatched when it commits
+_PENDING = 'pending_jobs'
+
+
+# ------------------------
+# Job Registry
+# ------------------------
+def job(max_attempts=None):
+    """
+    Mark a module-level function as a background job.
+
+    Queue it with ``job_queue.enqueue(func, *args, **kwargs)``; arguments
+    must be JSON-serializable so every backend can carry them. Jobs run
+    inside an app context, and exceptions are retried with backoff up to
+    ``max_attempts`` (default JOBS_MAX_ATTEMPTS) times.
+    """
+    def decorator(func):
+        func.job_name = f"{func.__module__}:{func.__qualname__}"
+        func.max_attempts = max_attempts
+        return func
+    return decorator
+
+
+def resolve(name):
+    """Import the job function registered as ``module:qualname``."""
+    module_name, _, attr = name.partition(':')
+    func = importlib.import_module(module_name)
+    for part in attr.split('.'):
+        func = getattr(func, part)
+    if not hasattr(func, 'job_name'):
+        raise LookupError(f"{name} is not a registered job")
+    return func
+
+
+def _run(name, payload):
+    args, kwargs = json.loads(payload)
+    resolve(name)(*args, **kwargs)
+
+
+# Process-pool workers build their own app once, on start-up
+_process_app = None
+
+
+def _init_process():
+    global _process_app
+    from . import create_app
+    _process_app = create_app()
+
+
+def _run_in_process(name, payload):
+    with _process_app.app_context():
+        _run(name, payload)
+
+
+# ------------------------
+# Queue
+# ------------------------
+class JobQueue:
+    """
+    Runs slow side effects off the request path.
+
+    JOBS_BACKEND selects where jobs go:
+
+    - ``thread``: a thread pool in this process (the default).
+    - ``process``: a process pool, for CPU-bound work such as resizing.
+    - ``sql``: rows in the ``job`` table, run by ``run_worker.py``. Jobs
+      survive restarts.
+    - ``sync``: run inline, for tests and scripts. Retries sleep in the
+      caller, and a job that still fails is logged rather than raised.
+
+    On every backend a job enqueued inside a transaction only starts once
+    that transaction commits (the sql backend writes its row in it), so a
+    job never sees data from before the commit, and a rolled-back request
+    queues nothing. Failed jobs are retried after an exponential, jittered
+    backoff.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.backend = app.config['JOBS_BACKEND']
+        if self.backend not in ('thread', 'process', 'sql', 'sync'):
+            raise ValueError(f"Unknown JOBS_BACKEND: {self.backend!r}")
+        self.workers = app.config['JOBS_WORKERS']
+        self.max_attempts = app.config['JOBS_MAX_ATTEMPTS']
+        self.base_delay = app.config['JOBS_RETRY_BASE_DELAY']
+        self.max_delay = app.config['JOBS_RETRY_MAX_DELAY']
+        app.extensions['jobs'] = self
+
+    def backoff(self, attempt):
+        """Seconds to wait before retrying after failed attempt number ``attempt``."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _attempts_for(self, func):
+        return func.max_attempts or self.max_attempts
+
+    def enqueue(self, func, *args, **kwargs):
+        """
+        Queue ``func(*args, **kwargs)``; returns the job row id on the sql
+        backend. Enqueuing the same call twice in one transaction queues it
+        once.
+        """
+        if not hasattr(func, 'job_name'):
+            raise TypeError(f"{func!r} is not decorated with @job")
+        payload = json.dumps([args, kwargs])
+        key = (func.job_name, payload)
+        max_attempts = self._attempts_for(func)
+
+        session = db.session()
+        if key in session.info.get(_PENDING, {}):
+            return session.info[_PENDING][key][2]
+
+        if self.backend == 'sql':
+            row = Job(name=func.job_name, payload=payload, max_attempts=max_attempts, run_at=datetime.utcnow())
+            db.session.add(row)
+            db.session.flush()
+            session.info.setdefault(_PENDING, {})[key] = (self, max_attempts, row.id)
+            return row.id
+
+        if session.in_transaction():
+            session.info.setdefault(_PENDING, {})[key] = (self, max_attempts, None)
+        else:
+            self._dispatch(func.job_name, payload, max_attempts)
+        return None
+
+    def _dispatch(self, name, payload, max_attempts):
+        if self.backend == 'sync':
+            self._run_sync(name, payload, max_attempts)
+        else:
+            self._submit(name, payload, max_attempts, 1)
+
+    def _run_sync(self, name, payload, max_attempts):
+        # Often called from the after_commit hook, so nothing may escape:
+        # the caller's transaction has already committed
+        for attempt in range(1, max_attempts + 1):
+            try:
+                # In a fresh app context, and so a fresh session: the caller's
+                # session has just committed and can't run queries in this hook
+                self._run_in_thread(name, payload)
+                return
+            except Exception as e:
+                if attempt >= max_attempts:
+                    logger.error('Job %s failed after %d attempts', name, attempt, exc_info=e)
+                    return
+                delay = self.backoff(attempt)
+                logger.warning('Job %s failed (attempt %d); retrying in %.1fs: %s', name, attempt, delay, e)
+                time.sleep(delay)
+
+    # -- thread / process pools ------------------------------------------
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                if self.backend == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='jobs')
+            return self._executor
+
+    def _run_in_thread(self, name, payload):
+        with self.app.app_context():
+            _run(name, payload)
+
+    def _submit(self, name, payload, max_attempts, attempt):
+        if self.backend == 'process':
+            future = self._pool().submit(_run_in_process, name, payload)
+        else:
+            future = self._pool().submit(self._run_in_thread, name, payload)
+        future.add_done_callback(lambda f: self._on_done(f, name, payload, max_attempts, attempt))
+
+    def _on_done(self, future, name, payload, max_attempts, attempt):
+        error = future.exception()
+        if error is None:
+            return
+        if attempt >= max_attempts:
+            logger.error('Job %s failed after %d attempts', name, attempt, exc_info=error)
+            return
+        delay = self.backoff(attempt)
+        logger.warning('Job %s failed (attempt %d); retrying in %.1fs: %s', name, attempt, delay, error)
+        timer = threading.Timer(delay, self._submit, args=(name, payload, max_attempts, attempt + 1))
+        timer.daemon = True
+        timer.start()
+
+    # -- sql worker ------------------------------------------------------
+    def run_worker(self, concurrency=None, once=False):
+        """
+        Poll the job table and run due jobs until interrupted (or, with
+        ``once``, until none are due or running). A job is claimed as soon
+        as a worker thread frees up, so one slow job never holds up the
+        others. Running jobs have their lease renewed; jobs left behind by
+        a crashed worker are picked up again after JOBS_LEASE_SECONDS.
+        """
+        concurrency = concurrency or self.workers
+        poll_interval = self.app.config['JOBS_POLL_INTERVAL']
+        lease = timedelta(seconds=self.app.config['JOBS_LEASE_SECONDS'])
+        renew_every = lease.total_seconds() / 3
+        running = {}  # future -> job id
+        last_renewal = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='worker') as pool:
+            while True:
+                with self.app.app_context():
+                    if running and time.monotonic() - last_renewal >= renew_every:
+                        self._renew_leases(list(running.values()))
+                        last_renewal = time.monotonic()
+                    self._requeue_expired(lease)
+                    claimed = self._claim(concurrency - len(running)) if len(running) < concurrency else []
+                for job_id in claimed:
+                    running[pool.submit(self._execute, job_id)] = job_id
+
+                if running:
+                    done, _ = wait(running, timeout=min(poll_interval, renew_every), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del running[future]
+                elif once:
+                    return
+                else:
+                    time.sleep(poll_interval)
+
+    def _renew_leases(self, job_ids):
+        db.session.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.status == RUNNING)
+            .values(locked_at=datetime.utcnow())
+        )
+        db.session.commit()
+
+    def _requeue_expired(self, lease):
+        db.session.execute(
+            update(Job)
+            .where(Job.status == RUNNING, Job.locked_at < datetime.utcnow() - lease)
+            .values(status=QUEUED, locked_at=None)
+        )
+        db.session.commit()
+
+    def _claim(self, limit):
+        now = datetime.utcnow()
+        query = (
+            select(Job.id)
+            .where(Job.status == QUEUED, Job.run_at <= now)
+            .order_by(Job.run_at, Job.id)
+            .limit(limit)
+        )
+        if db.engine.dialect.name == 'postgresql':
+            # Concurrent workers skip rows another worker is claiming
+            query = query.with_for_update(skip_locked=True)
+
+        claimed = []
+        for job_id in db.session.scalars(query).all():
+            # The status check makes the claim safe where SKIP LOCKED isn't available
+            taken = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == QUEUED)
+                .values(status=RUNNING, locked_at=now, attempts=Job.attempts + 1)
+            ).rowcount
+            if taken:
+                claimed.append(job_id)
+        db.session.commit()
+        return claimed
+
+    def _execute(self, job_id):
+        with self.app.app_context():
+            row = db.session.get(Job, job_id)
+            name, payload = row.name, row.payload
+            db.session.commit()
+            try:
+                _run(name, payload)
+            except Exception as e:
+                db.session.rollback()
+                row = db.session.get(Job, job_id)
+                if row.attempts >= row.max_attempts:
+                    row.status = FAILED
+                    logger.error('Job %s #%d failed after %d attempts', name, job_id, row.attempts, exc_info=e)
+                else:
+                    row.status = QUEUED
+                    row.run_at = datetime.utcnow() + timedelta(seconds=self.backoff(row.attempts))
+                    logger.warning('Job %s #%d failed (attempt %d); retrying: %s', name, job_id, row.attempts, e)
+                row.locked_at = None
+                row.last_error = f"{type(e).__name__}: {e}"[:2000]
+                db.session.commit()
+            else:
+                db.session.execute(delete(Job).where(Job.id == job_id))
+                db.session.commit()
+
+
+job_queue = JobQueue()
+
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_pending(session):
+    for (name, payload), (queue, max_attempts, row_id) in session.info.pop(_PENDING, {}).items():
+        if row_id is None:
+            # The transaction is already committed; a failure to hand the job
+            # off must not surface as an error from commit()
+            try:
+                queue._dispatch(name, payload, max_attempts)
+            except Exception:
+                logger.exception('Could not dispatch job %s', name)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,170 @@
+# project/likes.py
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import Post, PostLike
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------
+# Coalesced Counter
+# ------------------------
+class LikeCounter:
+    """
+    Buffers Post.like_count deltas per process and writes them in batches.
+
+    A viral post would otherwise take a row lock on every like; here each
+    flush applies the net delta per post in one executemany UPDATE, in post
+    id order so concurrent workers' flushes can't deadlock. Flushes run on a
+    background thread every LIKE_FLUSH_INTERVAL seconds, as soon as
+    LIKE_FLUSH_MAX_PENDING posts are waiting, and at exit. An interval of 0
+    writes every delta through immediately.
+
+    Deltas still buffered when a process is killed (SIGKILL, OOM) are lost,
+    leaving like_count off from the post_like rows; ``recount_like_counts``
+    (``recount_likes.py``) recomputes it from them.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 0
+        self.max_pending = 0
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config['LIKE_FLUSH_INTERVAL']
+        self.max_pending = app.config['LIKE_FLUSH_MAX_PENDING']
+        app.add_template_global(self.like_count)
+        app.extensions['like_counter'] = self
+        atexit.register(self.flush)
+
+    def add(self, post_id, delta):
+        with self._lock:
+            self._pending[post_id] += delta
+            backlog = len(self._pending)
+
+        if self.interval <= 0:
+            self.flush()
+        elif backlog >= self.max_pending:
+            self._wakeup.set()
+        self._ensure_thread()
+
+    def pending(self, post_id):
+        with self._lock:
+            return self._pending.get(post_id, 0)
+
+    def like_count(self, post):
+        """The post's stored count plus this process's unflushed likes."""
+        return max(0, (post.like_count or 0) + self.pending(post.id))
+
+    def flush(self):
+        """Write all buffered deltas; returns the number of posts updated."""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        rows = [{'b_id': post_id, 'b_delta': delta} for post_id, delta in sorted(batch.items()) if delta]
+        if not rows or self.app is None:
+            return 0
+
+        table = Post.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam('b_id'))
+            .values(like_count=table.c.like_count + bindparam('b_delta'))
+        )
+        try:
+            with self.app.app_context(), db.engine.begin() as connection:
+                connection.execute(statement, rows)
+        except Exception:
+            # Keep the deltas for the next attempt rather than losing likes
+            with self._lock:
+                self._pending.update(batch)
+            logger.exception('Failed to flush like counts for %d posts', len(rows))
+            return 0
+        return len(rows)
+
+    def _ensure_thread(self):
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='like-counter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+like_counter = LikeCounter()
+
+
+# ------------------------
+# Likes
+# ------------------------
+def toggle_like(user_id, post_id, liked=None):
+    """
+    Like or unlike a post for ``user_id`` and return whether it is now liked.
+
+    ``liked`` sets the state explicitly (so a retried request is harmless);
+    ``None`` flips it. The unique (user_id, post_id) constraint settles
+    double submissions, and only a row actually inserted or deleted moves
+    the counter.
+    """
+    match = (PostLike.user_id == user_id, PostLike.post_id == post_id)
+    exists = db.session.scalar(select(PostLike.id).where(*match)) is not None
+    if liked is None:
+        liked = not exists
+
+    if liked and not exists:
+        db.session.add(PostLike(user_id=user_id, post_id=post_id))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request from the same user already liked it
+            db.session.rollback()
+        else:
+            like_counter.add(post_id, 1)
+    elif not liked and exists:
+        removed = db.session.execute(delete(PostLike).where(*match)).rowcount
+        db.session.commit()
+        if removed:
+            like_counter.add(post_id, -removed)
+    return liked
+
+
+def recount_like_counts():
+    """
+    Reset Post.like_count from the post_like rows wherever the two disagree;
+    returns the number of posts corrected. Likes other processes still hold
+    unflushed are added on top when they flush, so run it again if the
+    counts were moving while it ran.
+    """
+    actual = select(func.count(PostLike.id)).where(PostLike.post_id == Post.id).scalar_subquery()
+    corrected = db.session.execute(
+        update(Post).where(Post.like_count != actual).values(like_count=actual)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return corrected
+
+
+def liked_post_ids(user_id, post_ids):
+    """The subset of ``post_ids`` that ``user_id`` has liked, in one query."""
+    if not post_ids:
+        return set()
+    return set(db.session.scalars(
+        select(PostLike.post_id).where(PostLike.user_id == user_id, PostLike.post_id.in_(post_ids))
+    ))
@@ -0,0 +1,40 @@
+# project/loaders.py
+from sqlalchemy.orm import joinedload, selectinload, undefer
+
+from .models import Post, Comment, Event
+
+
+# ------------------------
+# Relationship Loading Strategies
+# ------------------------
+# Each helper returns the loader options a view needs so that every
+# relationship its template touches is fetched up front in a fixed number
+# of batched ``IN`` queries, instead of one lazy SELECT per row.
+
+def feed_post_options():
+    """Posts rendered in the community feed, with their comment totals (threads load on demand)."""
+    return (
+        selectinload(Post.author),
+        undefer(Post.comment_count),
+    )
+
+
+def comment_options():
+    """Comments rendered in a thread, with their authors."""
+    return (
+        selectinload(Comment.author),
+    )
+
+
+def post_list_options():
+    """Posts rendered in tables that only show the author."""
+    return (
+        selectinload(Post.author),
+    )
+
+
+def event_list_options():
+    """Events rendered with their creator (many-to-one, so a join adds no rows)."""
+    return (
+        joinedload(Event.creator),
+    )
@@ -1,5 +1,6 @@
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import func, select
 from .extensions import db
 from werkzeug.security import generate_password_hash, check_password_hash
 # project/models.py
@@ -19,6 +20,7 @@ event_attendees = db.Table(
     db.Column('user_id', db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
     db.Column('event_id', db.Integer, db.ForeignKey('event.id', ondelete='CASCADE'), primary_key=True),
     db.Column('registered_at', db.DateTime, default=datetime.utcnow),
+    db.Index('ix_event_attendees_event_id', 'event_id'),
     extend_existing=True
 )
 
@@ -35,7 +37,7 @@ class User(db.Model, UserMixin):
     email = db.Column(db.String(255), unique=True, nullable=False)
     name = db.Column(db.String(255))
     password_hash = db.Column(db.String(255))
-    role = db.Column(db.String(20), default='viewer')
+    role = db.Column(db.String(20), default='viewer', index=True)
 
     headline = db.Column(db.String(255))
     bio = db.Column(db.Text)
@@ -71,14 +73,14 @@ class User(db.Model, UserMixin):
 
     posts = db.relationship(
         'Post',
-        backref='author',
+        backref=db.backref('author', lazy='selectin'),
         lazy='dynamic',
         cascade="all, delete-orphan"
     )
 
     comments = db.relationship(
         'Comment',
-        backref='author',
+        backref=db.backref('author', lazy='selectin'),
         lazy='dynamic',
         cascade="all, delete-orphan"
     )
@@ -102,7 +104,10 @@ class User(db.Model, UserMixin):
 # ---------------------------------------------------
 class OAuthToken(db.Model):
     __tablename__ = 'oauth_token'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_oauth_token_name_user_id', 'name', 'user_id'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50))
@@ -123,18 +128,24 @@ class OAuthToken(db.Model):
 # ---------------------------------------------------
 class Event(db.Model):
     __tablename__ = 'event'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_event_created_by_start_datetime', 'created_by', 'start_datetime'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
-    start_datetime = db.Column(db.DateTime, nullable=False)
+    start_datetime = db.Column(db.DateTime, nullable=False, index=True)
     end_datetime = db.Column(db.DateTime, nullable=False)
     meet_link = db.Column(db.String(512))
     calendar_event_id = db.Column(db.String(255))
     created_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'))
     banner_image = db.Column(db.String(255))
     capacity = db.Column(db.Integer)
+    # Kept in step with Registration rows by project.registrations; it is the
+    # row that is locked and conditionally incremented to enforce capacity.
+    registration_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     event_type = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -149,17 +160,62 @@ class Event(db.Model):
         return f"<Event {self.title}>"
 
 
+# ---------------------------------------------------
+# CALENDAR SYNC MODELS
+# ---------------------------------------------------
+class CalendarChange(db.Model):
+    """An event change waiting to be pushed to its creator's Google Calendar."""
+    __tablename__ = 'calendar_change'
+    __table_args__ = (
+        db.Index('ix_calendar_change_user_id_id', 'user_id', 'id'),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    # No foreign key: a deletion outlives its event
+    event_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(16), nullable=False)
+    calendar_event_id = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CalendarChange {self.action} {self.event_id}>"
+
+
+class CalendarSyncState(db.Model):
+    """Per-user incremental sync position and lease."""
+    __tablename__ = 'calendar_sync_state'
+    __table_args__ = {'extend_existing': True}
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    sync_token = db.Column(db.Text)
+    locked_until = db.Column(db.DateTime)
+    last_synced_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<CalendarSyncState {self.user_id}>"
+
+
 # ---------------------------------------------------
 # REGISTRATION MODEL
 # ---------------------------------------------------
 class Registration(db.Model):
     __tablename__ = 'registration'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'user_email', name='uq_registration_event_id_user_email'),
+        db.UniqueConstraint('event_id', 'idempotency_key', name='uq_registration_event_id_idempotency_key'),
+        # Serves both "registrations of an event" and its keyset-paginated list
+        db.Index('ix_registration_event_id_id', 'event_id', 'id'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id', ondelete='CASCADE'), nullable=False)
     user_name = db.Column(db.String(255))
     user_email = db.Column(db.String(255))
+    # Client-supplied key so a retried submission returns the original row
+    idempotency_key = db.Column(db.String(64))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -171,7 +227,10 @@ class Registration(db.Model):
 # ---------------------------------------------------
 class Post(db.Model):
     __tablename__ = 'post'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_post_created_at_id', 'created_at', 'id'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -179,6 +238,8 @@ class Post(db.Model):
     post_image = db.Column(db.String(255))
     author_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Denormalized from post_like; written in coalesced batches by likes.LikeCounter
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     messages = db.relationship(
         'Message',
@@ -194,10 +255,96 @@ class Post(db.Model):
         cascade="all, delete-orphan"
     )
 
+    likes = db.relationship(
+        'PostLike',
+        backref='post',
+        lazy='dynamic',
+        cascade="all, delete-orphan"
+    )
+
     def __repr__(self):
         return f"<Post {self.title}>"
 
 
+# ---------------------------------------------------
+# POST LIKE MODEL
+# ---------------------------------------------------
+class PostLike(db.Model):
+    __tablename__ = 'post_like'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'post_id', name='uq_post_like_user_id_post_id'),
+        db.Index('ix_post_like_post_id', 'post_id'),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PostLike {self.user_id}:{self.post_id}>"
+
+
+# ---------------------------------------------------
+# TIMELINE ENTRY MODEL
+# ---------------------------------------------------
+class TimelineEntry(db.Model):
+    """One post in a precomputed feed; see timeline.SQLTimelineStore."""
+    __tablename__ = 'timeline_entry'
+    __table_args__ = (
+        db.Index('ix_timeline_entry_audience_created_at_post_id', 'audience', 'created_at', 'post_id'),
+        {'extend_existing': True}
+    )
+
+    audience = db.Column(db.String(64), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id', ondelete='CASCADE'), primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<TimelineEntry {self.audience}:{self.post_id}>"
+
+
+class TimelineState(db.Model):
+    """When a precomputed feed was last rebuilt; no row means it must be."""
+    __tablename__ = 'timeline_state'
+    __table_args__ = {'extend_existing': True}
+
+    audience = db.Column(db.String(64), primary_key=True)
+    built_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<TimelineState {self.audience}>"
+
+
+# ---------------------------------------------------
+# JOB MODEL
+# ---------------------------------------------------
+class Job(db.Model):
+    """A queued background job; see jobs.JobQueue (sql backend)."""
+    __tablename__ = 'job'
+    __table_args__ = (
+        # Workers poll for the oldest due job
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    # JSON [args, kwargs]
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='queued', server_default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.name}>"
+
+
 # ---------------------------------------------------
 # MESSAGE MODEL
 # ---------------------------------------------------
@@ -219,7 +366,10 @@ class Message(db.Model):
 # ---------------------------------------------------
 class Comment(db.Model):
     __tablename__ = 'comment'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_comment_post_id_created_at', 'post_id', 'created_at'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -231,6 +381,14 @@ class Comment(db.Model):
         return f"<Comment {self.id}>"
 
 
+# Per-post comment total as a correlated subquery on the (post_id, created_at)
+# index; deferred, so only queries that undefer it (the feed) pay for it.
+Post.comment_count = db.column_property(
+    select(func.count(Comment.id)).where(Comment.post_id == Post.id).correlate_except(Comment).scalar_subquery(),
+    deferred=True
+)
+
+
 # ---------------------------------------------------
 # SITE CONFIG MODEL (Updated for Banner)
 # ---------------------------------------------------
@@ -243,7 +401,13 @@ class SiteConfig(db.Model):
 
     @classmethod
     def get_current(cls):
-        """Retrieve or create the single SiteConfig row."""
+        """Return a read-only copy of the SiteConfig row from the process cache."""
+        from .cache import site_config_cache
+        return site_config_cache.get()
+
+    @classmethod
+    def get_or_create(cls):
+        """Retrieve or create the single SiteConfig row for editing."""
         config = cls.query.get(1)
         if not config:
             config = cls(id=1)
@@ -3,6 +3,8 @@ from flask_login import current_user
 from .models import OAuthToken
 from .extensions import db, oauth
 
+CALENDAR_SCOPE = 'https://www.googleapis.com/auth/calendar.events'
+
 
 # Global OAuth instance
 
@@ -16,12 +18,15 @@ def fetch_token(name):
     token = OAuthToken.query.filter_by(name=name, user_id=current_user.id).first()
     return token.to_dict() if token else None
 
-def update_token(name, token):
-    if not current_user.is_authenticated:
-        return
-    tok = OAuthToken.query.filter_by(name=name, user_id=current_user.id).first()
+def update_token(name, token, user_id=None):
+    """Store a (refreshed) token for ``user_id``, or the signed-in user in a request."""
+    if user_id is None:
+        if not current_user.is_authenticated:
+            return
+        user_id = current_user.id
+    tok = OAuthToken.query.filter_by(name=name, user_id=user_id).first()
     if not tok:
-        tok = OAuthToken(name=name, user_id=current_user.id)
+        tok = OAuthToken(name=name, user_id=user_id)
         db.session.add(tok)
     tok.access_token = token.get('access_token')
     tok.refresh_token = token.get('refresh_token', tok.refresh_token)
@@ -35,13 +40,17 @@ def update_token(name, token):
 # ------------------------
 def init_oauth(app):
     scopes = ['openid', 'email', 'profile']
+    if app.config['CALENDAR_SYNC_BACKEND'] == 'google':
+        # Lets calendar_sync write organizers' events to their calendars
+        scopes.append(CALENDAR_SCOPE)
     oauth.register(
         name='google',
         client_id=app.config['GOOGLE_CLIENT_ID'],
         client_secret=app.config['GOOGLE_CLIENT_SECRET'],
         server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-        client_kwargs={
-            'scope': ' '.join(scopes),
+        client_kwargs={'scope': ' '.join(scopes)},
+        # Sent on the authorize URL itself; client_kwargs never reach it
+        authorize_params={
             'access_type': 'offline',  # allows refresh tokens
             'prompt': 'consent'        # ensures consent each time
         }
@@ -0,0 +1,115 @@
+# project/query_log.py
+import json
+import logging
+import os
+import re
+from collections import Counter, deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import g, has_request_context, request
+
+from .instrumentation import query_listeners
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_NAMED_PARAM = re.compile(r'%\(\w+\)s|(?<!:):\w+\b|%s')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_statement(statement):
+    """
+    Reduce a SQL statement to its shape: literals and bind parameters become
+    ``?`` and ``IN`` lists collapse, so repeats of one query compare equal.
+    """
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NAMED_PARAM.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _IN_LIST.sub('(?...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+def _request_role():
+    # Read the already-loaded user only: touching current_user here could
+    # trigger the user loader's own query from inside this hook.
+    user = g.get('_login_user')
+    return getattr(user, 'role', None) or 'anonymous'
+
+
+class SlowQueryLog:
+    """
+    Writes JSON lines to a rotating file for every statement slower than
+    SLOW_QUERY_THRESHOLD_MS, and for every statement shape a single request
+    ran more than DUPLICATE_QUERY_THRESHOLD times (usually an N+1 lazy load).
+    Each line carries the endpoint and the role of the user who hit it.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.logger = logging.getLogger('project.slow_queries')
+
+    def init_app(self, app):
+        if not app.config['SLOW_QUERY_LOG_ENABLED']:
+            return
+        self.threshold = app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000
+        self.duplicate_threshold = app.config['DUPLICATE_QUERY_THRESHOLD']
+        self.path = app.config['SLOW_QUERY_LOG_PATH']
+
+        if not self.logger.handlers:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            handler = RotatingFileHandler(
+                self.path,
+                maxBytes=app.config['SLOW_QUERY_LOG_MAX_BYTES'],
+                backupCount=app.config['SLOW_QUERY_LOG_BACKUPS']
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+
+        if self._on_query not in query_listeners:
+            query_listeners.append(self._on_query)
+        app.after_request(self._check_duplicates)
+        app.extensions['slow_query_log'] = self
+
+    def _write(self, kind, statement, **fields):
+        record = {'ts': datetime.utcnow().isoformat(timespec='seconds'), 'kind': kind}
+        if has_request_context():
+            record.update(endpoint=request.endpoint, path=request.path, role=_request_role())
+        record.update(fields)
+        record['statement'] = statement
+        self.logger.info(json.dumps(record))
+
+    def _on_query(self, statement, elapsed):
+        normalized = normalize_statement(statement)
+        if has_request_context():
+            counts = g.get('_statement_counts')
+            if counts is None:
+                counts = g._statement_counts = Counter()
+            counts[normalized] += 1
+        if elapsed >= self.threshold:
+            self._write('slow', normalized, duration_ms=round(elapsed * 1000, 2))
+
+    def _check_duplicates(self, response):
+        for statement, count in g.get('_statement_counts', Counter()).items():
+            if count > self.duplicate_threshold:
+                self._write('duplicate', statement, count=count)
+        return response
+
+    def recent(self, limit=200):
+        """The newest ``limit`` entries of the current log file, newest first."""
+        if not self.path or not os.path.exists(self.path):
+            return []
+        with open(self.path) as fh:
+            lines = deque(fh, maxlen=limit)
+        entries = []
+        for line in reversed(lines):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+
+
+slow_query_log = SlowQueryLog()
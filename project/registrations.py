@@ -0,0 +1,228 @@
+# project/registrations.py
+import csv
+from collections import namedtuple
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from flask import current_app
+
+from .models import db, Event, Registration
+
+# Outcomes of register_for_event
+CREATED = 'created'
+ALREADY_REGISTERED = 'already_registered'
+EVENT_FULL = 'event_full'
+EVENT_NOT_FOUND = 'event_not_found'
+
+RegistrationResult = namedtuple('RegistrationResult', 'status registration')
+
+# Rows inserted per executemany round trip (and per transaction) on import
+IMPORT_BATCH_SIZE = 1000
+
+
+class _SeatsChanged(Exception):
+    """Another writer took seats between an import batch's read and update."""
+
+
+class ImportAborted(Exception):
+    """
+    The rows could not be read to the end. Batches before the bad row are
+    already committed; ``summary`` counts them.
+    """
+
+    def __init__(self, error, summary):
+        super().__init__(str(error))
+        self.error = error
+        self.summary = summary
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def _find_existing(event_id, email, idempotency_key):
+    match = Registration.user_email == email
+    if idempotency_key:
+        match = or_(match, Registration.idempotency_key == idempotency_key)
+    return Registration.query.filter(Registration.event_id == event_id, match).first()
+
+
+def register_for_event(event_id, name, email, idempotency_key=None):
+    """
+    Register ``email`` for an event in one short transaction.
+
+    A conditional ``UPDATE`` claims a seat by bumping Event.registration_count
+    only while it is below capacity; on PostgreSQL that also row-locks the
+    event, so concurrent registrations queue on it instead of overbooking.
+    The unique (event_id, user_email) and (event_id, idempotency_key) constraints turn a
+    duplicate or retried submission into a rollback that returns the original
+    row. Commits on success; returns a RegistrationResult.
+    """
+    email = normalize_email(email)
+    idempotency_key = idempotency_key or None
+
+    existing = _find_existing(event_id, email, idempotency_key)
+    if existing is not None:
+        return RegistrationResult(ALREADY_REGISTERED, existing)
+
+    claimed = db.session.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .where(or_(Event.capacity.is_(None), Event.registration_count < Event.capacity))
+        .values(registration_count=Event.registration_count + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        if db.session.get(Event, event_id) is None:
+            return RegistrationResult(EVENT_NOT_FOUND, None)
+        return RegistrationResult(EVENT_FULL, None)
+
+    registration = Registration(
+        event_id=event_id,
+        user_name=name,
+        user_email=email,
+        idempotency_key=idempotency_key
+    )
+    db.session.add(registration)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Lost a race with an identical submission; its row (and seat) stand
+        db.session.rollback()
+        existing = _find_existing(event_id, email, idempotency_key)
+        if existing is None:
+            raise
+        return RegistrationResult(ALREADY_REGISTERED, existing)
+
+    return RegistrationResult(CREATED, registration)
+
+
+def get_registrant_page(event_id, after=None, page_size=None):
+    """
+    Return ``(registrations, next_after)`` for one page of an event's
+    registrants in signup order. ``after`` is the last id already shown;
+    keyset pagination keeps deep pages as cheap as the first.
+    """
+    page_size = page_size or current_app.config['REGISTRANT_PAGE_SIZE']
+    query = Registration.query.filter(Registration.event_id == event_id)
+    if after is not None:
+        query = query.filter(Registration.id > after)
+    registrations = query.order_by(Registration.id).limit(page_size + 1).all()
+
+    next_after = None
+    if len(registrations) > page_size:
+        registrations = registrations[:page_size]
+        next_after = registrations[-1].id
+    return registrations, next_after
+
+
+# ------------------------
+# Bulk Import
+# ------------------------
+def read_registration_csv(lines):
+    """
+    Yield ``(name, email)`` from CSV text lines with ``name`` and ``email``
+    columns (header names are case-insensitive). Rows are not validated here.
+    """
+    reader = csv.DictReader(lines)
+    if reader.fieldnames:
+        reader.fieldnames = [(field or '').strip().lower() for field in reader.fieldnames]
+    for row in reader:
+        yield (row.get('name') or '').strip(), row.get('email')
+
+
+def _insert_batch(event_id, batch):
+    """
+    Insert one batch in its own transaction and return (inserted, duplicates,
+    over_capacity). Seats are claimed with the same conditional counter
+    update as single registrations, after locking the event row.
+    """
+    emails = [email for _, email in batch]
+    existing = set(db.session.scalars(
+        select(Registration.user_email)
+        .where(Registration.event_id == event_id, Registration.user_email.in_(emails))
+    ))
+    fresh = [(name, email) for name, email in batch if email not in existing]
+
+    capacity, count = db.session.execute(
+        select(Event.capacity, Event.registration_count).where(Event.id == event_id).with_for_update()
+    ).one()
+    room = len(fresh) if capacity is None else max(0, min(len(fresh), capacity - count))
+    accepted = fresh[:room]
+
+    if accepted:
+        claimed = db.session.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .where(or_(Event.capacity.is_(None), Event.registration_count + len(accepted) <= Event.capacity))
+            .values(registration_count=Event.registration_count + len(accepted))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            raise _SeatsChanged()
+        db.session.execute(
+            insert(Registration),
+            [{'event_id': event_id, 'user_name': name, 'user_email': email} for name, email in accepted]
+        )
+    db.session.commit()
+    return len(accepted), len(batch) - len(fresh), len(fresh) - len(accepted)
+
+
+def import_registrations(event_id, rows, batch_size=IMPORT_BATCH_SIZE, attempts=3):
+    """
+    Bulk-register ``(name, email)`` pairs for an event with executemany
+    batches instead of one ORM object per row. Emails already registered
+    (or repeated in ``rows``) are skipped, and rows beyond the event's
+    capacity are dropped. Returns a dict of counts per outcome.
+
+    Batches commit as they fill, so a file too large to hold in memory can
+    be imported. If reading ``rows`` fails partway (a malformed CSV line,
+    bad encoding), the valid rows read so far are committed and
+    ImportAborted reports how many were imported; importing the fixed file
+    again skips them as duplicates.
+    """
+    summary = {'imported': 0, 'duplicates': 0, 'invalid': 0, 'over_capacity': 0}
+    seen = set()
+
+    def flush(batch):
+        for attempt in range(attempts):
+            try:
+                inserted, duplicates, over = _insert_batch(event_id, batch)
+                break
+            except (IntegrityError, _SeatsChanged):
+                # A concurrent registration claimed one of these emails or seats
+                db.session.rollback()
+                if attempt == attempts - 1:
+                    raise
+        summary['imported'] += inserted
+        summary['duplicates'] += duplicates
+        summary['over_capacity'] += over
+
+    batch = []
+    rows = iter(rows)
+    while True:
+        try:
+            name, email = next(rows)
+        except StopIteration:
+            break
+        except (csv.Error, UnicodeDecodeError) as e:
+            if batch:
+                flush(batch)
+            raise ImportAborted(e, summary) from e
+        email = normalize_email(email)
+        if not name or '@' not in email:
+            summary['invalid'] += 1
+            continue
+        if email in seen:
+            summary['duplicates'] += 1
+            continue
+        seen.add(email)
+        batch.append((name, email))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return summary
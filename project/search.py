@@ -0,0 +1,207 @@
+# project/search.py
+import re
+from collections import namedtuple
+
+from flask import current_app
+from markupsafe import Markup, escape
+from sqlalchemy import event, text
+
+from .extensions import db
+from .models import Event, Post, User
+
+# kind -> (code, model). SQLite packs both into the FTS rowid as id * 4 + code
+# so a row's index entry can be found (and replaced) without a scan.
+KINDS = {
+    'post': (1, Post),
+    'event': (2, Event),
+    'user': (3, User),
+}
+ROWID_STRIDE = 4
+_KIND_BY_CODE = {code: kind for kind, (code, _) in KINDS.items()}
+
+# Highlight markers; swapped for <mark> only after the snippet is escaped
+_MARK_START, _MARK_END = '\x02', '\x03'
+
+SearchResult = namedtuple('SearchResult', 'kind item snippet')
+SearchPage = namedtuple('SearchPage', 'results page has_next')
+
+
+# ------------------------
+# Schema
+# ------------------------
+def _sqlite_ddl(backfill=True):
+    # (kind code, table, title column, body expression over a row alias, watched columns)
+    sources = (
+        (1, 'post', 'title', "{r}.content", 'title, content'),
+        (2, 'event', 'title', "{r}.description", 'title, description'),
+        (3, 'users', 'name',
+         "coalesce({r}.headline, '') || ' ' || coalesce({r}.skills, '') || ' ' || coalesce({r}.company, '')",
+         'name, headline, skills, company'),
+    )
+    statements = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(title, body, tokenize='porter unicode61')"
+    ]
+    for code, table, title, body, watched in sources:
+        insert_new = (
+            f"INSERT INTO search_index (rowid, title, body) "
+            f"VALUES (new.id * {ROWID_STRIDE} + {code}, new.{title}, {body.format(r='new')});"
+        )
+        delete_old = f"DELETE FROM search_index WHERE rowid = old.id * {ROWID_STRIDE} + {code};"
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF {watched} ON {table} "
+            f"BEGIN {delete_old} {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        ]
+        if backfill:
+            statements.append(
+                f"INSERT INTO search_index (rowid, title, body) "
+                f"SELECT t.id * {ROWID_STRIDE} + {code}, t.{title}, {body.format(r='t')} FROM {table} AS t"
+            )
+    return statements
+
+
+def _postgres_ddl():
+    # Generated columns are recomputed by Postgres itself on every write
+    sources = (
+        ('post', "coalesce(title, '')", "coalesce(content, '')"),
+        ('event', "coalesce(title, '')", "coalesce(description, '')"),
+        ('users', "coalesce(name, '')",
+         "coalesce(headline, '') || ' ' || coalesce(skills, '') || ' ' || coalesce(company, '')"),
+    )
+    statements = []
+    for table, title, body in sources:
+        statements += [
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('english', {title}), 'A') || "
+            f"setweight(to_tsvector('english', {body}), 'B')) STORED",
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)",
+        ]
+    return statements
+
+
+def install_search_schema(connection):
+    """Create the full-text index for ``connection``'s dialect and index existing rows."""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        # The triggers keep an existing index current; only a new one needs filling
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        ).first()
+        statements = _sqlite_ddl(backfill=exists is None)
+    else:
+        statements = _postgres_ddl() if dialect == 'postgresql' else []
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_schema(target, connection, **kw):
+    # db.create_all() (tests, benchmarks, fresh dev databases) gets the index too
+    install_search_schema(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_search_schema(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("DROP TABLE IF EXISTS search_index")
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Alembic filter: the search index lives outside the models, so don't autogenerate drops for it."""
+    if type_ == 'table' and name.startswith('search_index'):
+        return False
+    if type_ == 'column' and name == 'search_vector':
+        return False
+    if type_ == 'index' and name.endswith('_search_vector'):
+        return False
+    return True
+
+
+# ------------------------
+# Queries
+# ------------------------
+def _terms(query):
+    # Only word characters reach the engine, so user input can never be a
+    # syntax error; every term must match and the last may be a prefix.
+    return re.findall(r'\w+', query or '')[:10]
+
+
+def _sqlite_hits(terms, codes, limit, offset):
+    match = ' '.join(f'"{term}"' for term in terms) + '*'
+    sql = text(
+        "SELECT rowid, snippet(search_index, 1, :start, :end, '…', 16) "
+        "FROM search_index WHERE search_index MATCH :match "
+        f"AND rowid % {ROWID_STRIDE} IN ({', '.join(str(code) for code in codes)}) "
+        "ORDER BY bm25(search_index, 10.0, 1.0) LIMIT :limit OFFSET :offset"
+    )
+    rows = db.session.execute(sql, {
+        'match': match, 'start': _MARK_START, 'end': _MARK_END, 'limit': limit, 'offset': offset
+    })
+    return [(_KIND_BY_CODE[rowid % ROWID_STRIDE], rowid // ROWID_STRIDE, snippet) for rowid, snippet in rows]
+
+
+def _postgres_hits(terms, codes, limit, offset):
+    bodies = {
+        1: ('post', 'content'),
+        2: ('event', 'description'),
+        3: ('users', "concat_ws(' ', headline, skills, company)"),
+    }
+    branches = ' UNION ALL '.join(
+        f"SELECT {code} AS kind, id, ts_rank_cd(search_vector, q.query) AS rank, {body} AS body "
+        f"FROM {table}, q WHERE search_vector @@ q.query"
+        for code, (table, body) in bodies.items() if code in codes
+    )
+    # Headlines are costly, so only the rows on this page get one
+    sql = text(
+        "WITH q AS (SELECT to_tsquery('english', :query) AS query), "
+        f"hits AS ({branches}) "
+        "SELECT kind, id, ts_headline('english', coalesce(body, ''), q.query, :options) "
+        "FROM (SELECT * FROM hits ORDER BY rank DESC, id LIMIT :limit OFFSET :offset) AS page, q "
+        "ORDER BY rank DESC, id"
+    )
+    rows = db.session.execute(sql, {
+        'query': ' & '.join(terms) + ':*',
+        'options': f'StartSel={_MARK_START}, StopSel={_MARK_END}, MaxFragments=1, MaxWords=20, MinWords=8',
+        'limit': limit,
+        'offset': offset,
+    })
+    return [(_KIND_BY_CODE[code], ref_id, snippet) for code, ref_id, snippet in rows]
+
+
+def _highlight(snippet):
+    return Markup(
+        str(escape(snippet or '')).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+    )
+
+
+def search(query, kinds=None, page=1, page_size=None):
+    """
+    Ranked full-text search over posts, events and user profiles.
+
+    ``kinds`` limits the result types (defaults to all). Results are
+    hydrated with one ``IN`` query per type and keep the engine's ranking.
+    """
+    page_size = page_size or current_app.config['SEARCH_PAGE_SIZE']
+    terms = _terms(query)
+    codes = [KINDS[kind][0] for kind in (kinds or KINDS)]
+    if not terms or not codes:
+        return SearchPage([], page, False)
+
+    find = _sqlite_hits if db.engine.dialect.name == 'sqlite' else _postgres_hits
+    hits = find(terms, codes, page_size + 1, (page - 1) * page_size)
+    has_next = len(hits) > page_size
+    hits = hits[:page_size]
+
+    loaded = {}
+    for kind, (_, model) in KINDS.items():
+        ids = [ref_id for hit_kind, ref_id, _ in hits if hit_kind == kind]
+        if ids:
+            loaded[kind] = {item.id: item for item in model.query.filter(model.id.in_(ids))}
+
+    results = [
+        SearchResult(kind, loaded[kind][ref_id], _highlight(snippet))
+        for kind, ref_id, snippet in hits
+        if ref_id in loaded.get(kind, {})
+    ]
+    return SearchPage(results, page, has_next)
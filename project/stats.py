@@ -0,0 +1,108 @@
+# project/stats.py
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import case, func, literal, select, union_all
+
+from .cache import TTLCache
+from .extensions import db
+from .models import User, Event, Post, Registration, event_attendees
+
+# Feed sidebar totals; a full COUNT(*) per feed view isn't worth it for
+# numbers nobody expects to be live
+_community_counts = TTLCache(maxsize=1, ttl=60)
+
+
+# ------------------------
+# Dashboard Statistics
+# ------------------------
+# Counters are computed with SQL aggregates so dashboards never load
+# entity rows just to take their length.
+
+def user_counts_by_role():
+    """Return ``{role: count}`` for every role present in the users table."""
+    rows = db.session.query(User.role, func.count(User.id)).group_by(User.role).all()
+    return {role: count for role, count in rows}
+
+
+def event_counts(now=None):
+    """Return ``(total_events, active_events)`` in a single query."""
+    now = now or datetime.utcnow()
+    total, active = db.session.query(
+        func.count(Event.id),
+        func.coalesce(func.sum(case((Event.end_datetime > now, 1), else_=0)), 0)
+    ).one()
+    return total, active
+
+
+def community_counts():
+    """
+    Return ``(post_count, user_count)`` from one query, reused for
+    COMMUNITY_STATS_TTL seconds (0 counts on every call).
+    """
+    counts = _community_counts.get('counts')
+    if counts is None:
+        counts = tuple(db.session.execute(select(
+            select(func.count(Post.id)).scalar_subquery(),
+            select(func.count(User.id)).scalar_subquery()
+        )).one())
+        ttl = current_app.config['COMMUNITY_STATS_TTL']
+        if ttl > 0:
+            _community_counts.set('counts', counts, ttl=ttl)
+    return counts
+
+
+def get_dashboard_stats(now=None):
+    """Collect the counters shown on the admin dashboard."""
+    roles = current_app.config['ROLES']
+    by_role = user_counts_by_role()
+    total_events, active_events = event_counts(now)
+
+    return {
+        'user_count': sum(by_role.values()),
+        'team_count': by_role.get(roles['TEAM'], 0),
+        'total_events': total_events,
+        'active_events': active_events,
+    }
+
+
+# ------------------------
+# Per-Event Counters
+# ------------------------
+def event_participation_counts(event_ids):
+    """
+    Return ``{event_id: (attendees, registrations)}`` for the given events.
+
+    Both tables are folded into a single grouped query, so the cost does not
+    grow with the number of events on the page.
+    """
+    event_ids = list(set(event_ids))
+    if not event_ids:
+        return {}
+
+    rows = union_all(
+        select(
+            event_attendees.c.event_id.label('event_id'),
+            literal(1).label('attendee'),
+            literal(0).label('registration')
+        ).where(event_attendees.c.event_id.in_(event_ids)),
+        select(
+            Registration.event_id.label('event_id'),
+            literal(0).label('attendee'),
+            literal(1).label('registration')
+        ).where(Registration.event_id.in_(event_ids))
+    ).subquery()
+
+    result = db.session.execute(
+        select(rows.c.event_id, func.sum(rows.c.attendee), func.sum(rows.c.registration))
+        .group_by(rows.c.event_id)
+    )
+    return {event_id: (int(attendees), int(registrations)) for event_id, attendees, registrations in result}
+
+
+def annotate_event_counts(events):
+    """Set ``attendees_count`` and ``registrations_count`` on each event."""
+    counts = event_participation_counts(ev.id for ev in events)
+    for ev in events:
+        ev.attendees_count, ev.registrations_count = counts.get(ev.id, (0, 0))
+    return events
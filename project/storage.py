@@ -0,0 +1,228 @@
+# project/storage.py
+import io
+import mimetypes
+import os
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+
+from flask import Response, send_from_directory, stream_with_context, url_for
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _content_type(name):
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+# ------------------------
+# Storage Interface
+# ------------------------
+class Storage(ABC):
+    """
+    Where uploaded blobs live. Writes are streamed: ``write_temp`` consumes an
+    iterable of byte chunks into a temporary object, and ``commit`` moves it
+    to its final name once that name (a content hash) is known.
+    """
+
+    @abstractmethod
+    def write_temp(self, chunks):
+        """Stream ``chunks`` to a temporary object and return a token for it."""
+
+    @abstractmethod
+    def commit(self, token, name):
+        """Move a temporary object to ``name``; returns False if ``name`` already existed."""
+
+    @abstractmethod
+    def write(self, name, data):
+        """Store ``data`` (bytes) under ``name``, replacing any existing object."""
+
+    @abstractmethod
+    def exists(self, name):
+        """Whether an object called ``name`` is stored."""
+
+    @abstractmethod
+    def open(self, name):
+        """Return a readable, seekable binary file object for ``name``."""
+
+    @abstractmethod
+    def send(self, name, max_age):
+        """Build a response that serves ``name`` to the browser."""
+
+    def url(self, name):
+        return url_for('main.media', filename=name)
+
+
+# ------------------------
+# Local Filesystem
+# ------------------------
+class LocalStorage(Storage):
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def write_temp(self, chunks):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def commit(self, token, name):
+        if self.exists(name):
+            os.remove(token)
+            return False
+        os.replace(token, self._path(name))
+        return True
+
+    def write(self, name, data):
+        tmp_path = self.write_temp([data])
+        os.replace(tmp_path, self._path(name))
+
+    def exists(self, name):
+        return os.path.exists(self._path(name))
+
+    def open(self, name):
+        return open(self._path(name), 'rb')
+
+    def send(self, name, max_age):
+        return send_from_directory(self.root, name, max_age=max_age)
+
+
+# ------------------------
+# S3-Compatible Object Storage
+# ------------------------
+class S3Storage(Storage):
+    """
+    Blobs in an S3 bucket. ``endpoint_url`` points it at any S3-compatible
+    service such as MinIO. Requires ``boto3``, which is only imported here.
+    """
+
+    # S3 requires every multipart part except the last to be at least 5MB
+    PART_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, bucket, endpoint_url=None, region=None, access_key=None, secret_key=None, public_url=None):
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the 'boto3' package") from e
+
+        self.bucket = bucket
+        self.public_url = public_url.rstrip('/') if public_url else None
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key
+        )
+
+    def write_temp(self, chunks):
+        key = f"tmp/{uuid.uuid4().hex}"
+        buffer = bytearray()
+        upload_id = None
+        parts = []
+        try:
+            for chunk in chunks:
+                buffer += chunk
+                if len(buffer) >= self.PART_SIZE:
+                    if upload_id is None:
+                        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)['UploadId']
+                    parts.append(self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+                    buffer.clear()
+
+            if upload_id is None:
+                # Small object: a single PUT is cheaper than a multipart upload
+                self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(buffer))
+            else:
+                if buffer:
+                    parts.append(self._upload_part(key, upload_id, len(parts) + 1, bytes(buffer)))
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+                )
+        except BaseException:
+            if upload_id is not None:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return key
+
+    def _upload_part(self, key, upload_id, number, data):
+        etag = self.client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=data
+        )['ETag']
+        return {'ETag': etag, 'PartNumber': number}
+
+    def commit(self, token, name):
+        try:
+            if self.exists(name):
+                return False
+            self.client.copy_object(
+                Bucket=self.bucket, Key=name, CopySource={'Bucket': self.bucket, 'Key': token},
+                ContentType=_content_type(name), MetadataDirective='REPLACE'
+            )
+            return True
+        finally:
+            self.client.delete_object(Bucket=self.bucket, Key=token)
+
+    def write(self, name, data):
+        self.client.put_object(Bucket=self.bucket, Key=name, Body=data, ContentType=_content_type(name))
+
+    def exists(self, name):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def open(self, name):
+        body = self.client.get_object(Bucket=self.bucket, Key=name)['Body']
+        return io.BytesIO(body.read())
+
+    def send(self, name, max_age):
+        from botocore.exceptions import ClientError
+        from werkzeug.exceptions import NotFound
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=name)
+        except ClientError:
+            raise NotFound()
+
+        response = Response(
+            stream_with_context(obj['Body'].iter_chunks(CHUNK_SIZE)),
+            mimetype=obj.get('ContentType') or _content_type(name)
+        )
+        response.content_length = obj.get('ContentLength')
+        response.set_etag(obj.get('ETag', '').strip('"'))
+        response.cache_control.max_age = max_age
+        return response
+
+    def url(self, name):
+        if self.public_url:
+            return f"{self.public_url}/{name}"
+        return super().url(name)
+
+
+def init_storage(app):
+    """Create the configured storage backend and register it on ``app``."""
+    if app.config['STORAGE_BACKEND'] == 's3':
+        storage = S3Storage(
+            bucket=app.config['S3_BUCKET'],
+            endpoint_url=app.config['S3_ENDPOINT_URL'],
+            region=app.config['S3_REGION'],
+            access_key=app.config['S3_ACCESS_KEY_ID'],
+            secret_key=app.config['S3_SECRET_ACCESS_KEY'],
+            public_url=app.config['S3_PUBLIC_URL']
+        )
+    else:
+        storage = LocalStorage(app.config['UPLOAD_FOLDER'])
+    app.extensions['storage'] = storage
+    return storage
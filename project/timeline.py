@@ -0,0 +1,284 @@
+# project/timeline.py
+import bisect
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import Post, TimelineEntry, TimelineState
+
+logger = logging.getLogger(__name__)
+
+# Every signed-in user sees the same community feed, so posts fan out to a
+# single audience today; per-role or per-follower lists would be new keys.
+AUDIENCE_PUBLIC = 'public'
+AUDIENCES = (AUDIENCE_PUBLIC,)
+
+
+# ------------------------
+# Stores
+# ------------------------
+class TimelineStore(ABC):
+    """
+    Bounded per-audience lists of ``(created_at, post_id)``, newest first.
+
+    Posts are appended when they are published, so reading a feed page is a
+    slice of precomputed ids rather than a sort over the posts table. Each
+    list keeps only its newest ``max_length`` entries; older pages fall back
+    to querying posts directly.
+
+    A list is rebuilt from posts on its first read, after ``mark_stale``
+    (e.g. a failed push), and once it is ``rebuild_after`` seconds old, which
+    picks up posts inserted without going through ``publish_post``.
+    """
+
+    def __init__(self, max_length, rebuild_after=0):
+        self.max_length = max_length
+        self.rebuild_after = rebuild_after
+
+    @abstractmethod
+    def push(self, audience, post_id, created_at):
+        """Add a post, dropping the oldest entry past ``max_length``."""
+
+    @abstractmethod
+    def remove(self, audience, post_id):
+        """Drop a post from the list, if present."""
+
+    @abstractmethod
+    def page(self, audience, before=None, limit=20):
+        """Up to ``limit`` entries older than the ``(created_at, post_id)`` key ``before``."""
+
+    @abstractmethod
+    def size(self, audience):
+        """Number of entries held for ``audience``."""
+
+    @abstractmethod
+    def built_at(self, audience):
+        """When ``audience`` was last rebuilt, or None if it needs a rebuild."""
+
+    @abstractmethod
+    def mark_stale(self, audience):
+        """Have the next read rebuild ``audience``."""
+
+    def is_built(self, audience):
+        built_at = self.built_at(audience)
+        if built_at is None:
+            return False
+        return not self.rebuild_after or built_at > datetime.utcnow() - timedelta(seconds=self.rebuild_after)
+
+    @abstractmethod
+    def rebuild(self, audience, entries):
+        """Replace the list with ``entries`` (any order) and mark it built."""
+
+
+class MemoryTimelineStore(TimelineStore):
+    """
+    In-process store for tests and single-process development. Each worker
+    process holds its own lists, so don't use it behind a multi-worker server.
+    """
+
+    def __init__(self, max_length, rebuild_after=0):
+        super().__init__(max_length, rebuild_after)
+        self._lists = {}
+        self._built = {}
+        self._lock = threading.Lock()
+
+    def push(self, audience, post_id, created_at):
+        with self._lock:
+            entries = self._lists.setdefault(audience, [])
+            if (created_at, post_id) not in entries:
+                bisect.insort(entries, (created_at, post_id))
+                del entries[:-self.max_length]
+
+    def remove(self, audience, post_id):
+        with self._lock:
+            entries = self._lists.get(audience, [])
+            entries[:] = [entry for entry in entries if entry[1] != post_id]
+
+    def page(self, audience, before=None, limit=20):
+        with self._lock:
+            entries = self._lists.get(audience, [])
+            end = len(entries) if before is None else bisect.bisect_left(entries, before)
+            return entries[max(0, end - limit):end][::-1]
+
+    def size(self, audience):
+        with self._lock:
+            return len(self._lists.get(audience, []))
+
+    def built_at(self, audience):
+        return self._built.get(audience)
+
+    def mark_stale(self, audience):
+        self._built.pop(audience, None)
+
+    def rebuild(self, audience, entries):
+        with self._lock:
+            self._lists[audience] = sorted(entries)[-self.max_length:]
+            self._built[audience] = datetime.utcnow()
+
+
+class SQLTimelineStore(TimelineStore):
+    """
+    Keeps the lists in the timeline_entry table, shared by every worker; a
+    timeline_state row records when each was last rebuilt.
+    """
+
+    def push(self, audience, post_id, created_at):
+        db.session.add(TimelineEntry(audience=audience, post_id=post_id, created_at=created_at))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return
+        self._trim(audience)
+
+    def _trim(self, audience):
+        cutoff = db.session.execute(
+            select(TimelineEntry.created_at, TimelineEntry.post_id)
+            .where(TimelineEntry.audience == audience)
+            .order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc())
+            .offset(self.max_length).limit(1)
+        ).first()
+        if cutoff is None:
+            return
+        db.session.execute(
+            delete(TimelineEntry)
+            .where(TimelineEntry.audience == audience)
+            .where(or_(
+                TimelineEntry.created_at < cutoff.created_at,
+                and_(TimelineEntry.created_at == cutoff.created_at, TimelineEntry.post_id <= cutoff.post_id)
+            ))
+        )
+        db.session.commit()
+
+    def remove(self, audience, post_id):
+        db.session.execute(
+            delete(TimelineEntry).where(TimelineEntry.audience == audience, TimelineEntry.post_id == post_id)
+        )
+        db.session.commit()
+
+    def page(self, audience, before=None, limit=20):
+        query = select(TimelineEntry.created_at, TimelineEntry.post_id).where(TimelineEntry.audience == audience)
+        if before is not None:
+            created_at, post_id = before
+            query = query.where(or_(
+                TimelineEntry.created_at < created_at,
+                and_(TimelineEntry.created_at == created_at, TimelineEntry.post_id < post_id)
+            ))
+        rows = db.session.execute(
+            query.order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc()).limit(limit)
+        )
+        return [tuple(row) for row in rows]
+
+    def size(self, audience):
+        return db.session.scalar(
+            select(func.count()).select_from(TimelineEntry).where(TimelineEntry.audience == audience)
+        )
+
+    def built_at(self, audience):
+        return db.session.scalar(select(TimelineState.built_at).where(TimelineState.audience == audience))
+
+    def mark_stale(self, audience):
+        db.session.execute(delete(TimelineState).where(TimelineState.audience == audience))
+        db.session.commit()
+
+    def rebuild(self, audience, entries):
+        db.session.execute(delete(TimelineEntry).where(TimelineEntry.audience == audience))
+        newest = sorted(entries)[-self.max_length:]
+        if newest:
+            db.session.execute(
+                TimelineEntry.__table__.insert(),
+                [{'audience': audience, 'post_id': post_id, 'created_at': created_at} for created_at, post_id in newest]
+            )
+        db.session.merge(TimelineState(audience=audience, built_at=datetime.utcnow()))
+        db.session.commit()
+
+
+def init_timeline(app):
+    """Create the configured timeline store, if any, and register it on ``app``."""
+    backend = app.config['TIMELINE_BACKEND']
+    if not backend:
+        return None
+    max_length, rebuild_after = app.config['TIMELINE_MAX_LENGTH'], app.config['TIMELINE_REBUILD_AFTER']
+    if backend == 'sql':
+        store = SQLTimelineStore(max_length, rebuild_after)
+    elif backend == 'memory':
+        store = MemoryTimelineStore(max_length, rebuild_after)
+    else:
+        raise ValueError(f"Unknown TIMELINE_BACKEND: {backend!r}")
+    app.extensions['timeline'] = store
+    return store
+
+
+# ------------------------
+# Fan-out
+# ------------------------
+def get_timeline():
+    return current_app.extensions.get('timeline')
+
+
+def _audiences(post):
+    return (AUDIENCE_PUBLIC,)
+
+
+def publish_post(post):
+    """Append a committed post to the timeline of every audience that sees it."""
+    store = get_timeline()
+    if store is None:
+        return
+    try:
+        for audience in _audiences(post):
+            store.push(audience, post.id, post.created_at)
+    except Exception:
+        # Never fail the write for this; the list is now missing the post,
+        # so have the next read rebuild it from posts
+        db.session.rollback()
+        logger.exception('Failed to add post %s to timelines', post.id)
+        _mark_stale(store)
+
+
+def retract_post(post_id):
+    """Drop a deleted post from every timeline."""
+    store = get_timeline()
+    if store is None:
+        return
+    try:
+        for audience in AUDIENCES:
+            store.remove(audience, post_id)
+    except Exception:
+        db.session.rollback()
+        logger.exception('Failed to remove post %s from timelines', post_id)
+        _mark_stale(store)
+
+
+def _mark_stale(store):
+    try:
+        for audience in AUDIENCES:
+            store.mark_stale(audience)
+    except Exception:
+        db.session.rollback()
+        logger.exception('Failed to mark timelines stale')
+
+
+def rebuild_timeline(store, audience):
+    """Refill a timeline from the newest posts; returns how many it holds."""
+    rows = db.session.execute(
+        select(Post.created_at, Post.id)
+        .where(Post.created_at.isnot(None))
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(store.max_length)
+    )
+    entries = [tuple(row) for row in rows]
+    store.rebuild(audience, entries)
+    return len(entries)
+
+
+def ensure_built(store, audience):
+    """Rebuild a timeline that was never built, was marked stale or has expired."""
+    if not store.is_built(audience):
+        rebuild_timeline(store, audience)
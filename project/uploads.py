@@ -0,0 +1,190 @@
+# project/uploads.py
+import hashlib
+import io
+import os
+import re
+import tempfile
+from urllib.parse import urlparse
+
+from flask import current_app, url_for
+from PIL import Image, ImageOps
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+
+from .cache import TTLCache
+from .jobs import job, job_queue
+from .storage import CHUNK_SIZE
+
+# ------------------------
+# Image Variants
+# ------------------------
+# name -> (max width, max height, crop to exact size)
+IMAGE_VARIANTS = {
+    'avatar_48': (48, 48, True),
+    'avatar_80': (80, 80, True),
+    'card': (640, 640, False),
+    'full': (1600, 1600, False),
+}
+
+# Stored blobs are named "<sha256><ext>"; their variants "<sha256>.<variant>.webp"
+CONTENT_ADDRESSED = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9_]+)?\.[a-z0-9]+$')
+
+# Pillow format -> extension of the stored blob; any other upload is rejected
+IMAGE_FORMATS = {'PNG': '.png', 'JPEG': '.jpg', 'GIF': '.gif', 'WEBP': '.webp'}
+# Extensions /media will serve; ".jpeg" covers blobs renamed by dedupe_uploads.py
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+# Uploads are spooled locally (in memory up to this size) so they can be
+# verified before anything reaches storage
+_SPOOL_MEMORY_BYTES = 1024 * 1024
+
+# Where uploads were served from before they moved into storage
+LEGACY_UPLOAD_PREFIX = 'static/uploads/'
+
+# Blobs never change once written, so a positive existence check can be reused.
+# Misses are kept briefly too: a variant still being rendered would otherwise
+# cost a storage round trip (an S3 HEAD) on every page that shows it.
+_known_blobs = TTLCache(maxsize=10000, ttl=24 * 3600)
+_MISS_TTL = 30
+
+
+# generate_variants writes variants in order, so the last one marks a finished set
+_LAST_VARIANT = list(IMAGE_VARIANTS)[-1]
+
+
+def variant_name(filename, variant):
+    return f"{os.path.splitext(filename)[0]}.{variant}.webp"
+
+
+def is_variant(filename):
+    return filename.endswith(tuple(f".{variant}.webp" for variant in IMAGE_VARIANTS))
+
+
+def _extension(filename):
+    return os.path.splitext(filename)[1].lower() or '.bin'
+
+
+class InvalidImage(BadRequest):
+    description = 'Uploads must be PNG, JPEG, GIF or WebP images.'
+
+
+def _image_extension(fh):
+    """Verify ``fh`` holds an allowed image and return the extension for its format."""
+    try:
+        with Image.open(fh) as img:
+            image_format = img.format
+            img.verify()
+    except Exception as exc:
+        raise InvalidImage() from exc
+    if image_format not in IMAGE_FORMATS:
+        raise InvalidImage()
+    fh.seek(0)
+    return IMAGE_FORMATS[image_format]
+
+
+def content_address(data, filename):
+    """Name a blob after the SHA-256 of its bytes, keeping the original extension."""
+    return hashlib.sha256(data).hexdigest() + _extension(filename)
+
+
+def generate_variants(storage, filename):
+    """Write a resized WebP copy of ``filename`` for every IMAGE_VARIANTS entry."""
+    with storage.open(filename) as fh, Image.open(fh) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        for variant, (width, height, crop) in IMAGE_VARIANTS.items():
+            if crop:
+                resized = ImageOps.fit(img, (width, height), Image.LANCZOS)
+            else:
+                resized = img.copy()
+                resized.thumbnail((width, height), Image.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, 'WEBP', quality=80, method=4)
+            storage.write(variant_name(filename, variant), out.getvalue())
+            _known_blobs.set(variant_name(filename, variant), True)
+
+
+@job(max_attempts=3)
+def generate_upload_variants(filename):
+    """Background job: render the variants of a newly stored upload."""
+    generate_variants(current_app.extensions['storage'], filename)
+
+
+# ------------------------
+# Public Helpers
+# ------------------------
+def save_image_upload(file, filename):
+    """
+    Store an uploaded image once per distinct content and return its blob name.
+
+    The body is copied in CHUNK_SIZE pieces into a local spool while being
+    hashed, and the upload is rejected with 413 as soon as it passes
+    UPLOAD_MAX_BYTES. The spool is then checked with Pillow: anything that is
+    not a PNG, JPEG, GIF or WebP image is rejected with 400, and the stored
+    extension comes from the detected format, never from the client's
+    ``filename``. Resized variants are rendered as a background job;
+    ``upload_url`` falls back to the original until then.
+    """
+    storage = current_app.extensions['storage']
+    max_bytes = current_app.config['UPLOAD_MAX_BYTES']
+    digest = hashlib.sha256()
+
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MEMORY_BYTES) as spool:
+        size = 0
+        for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+            size += len(chunk)
+            if size > max_bytes:
+                raise RequestEntityTooLarge(f"Uploads are limited to {max_bytes} bytes.")
+            digest.update(chunk)
+            spool.write(chunk)
+
+        spool.seek(0)
+        name = digest.hexdigest() + _image_extension(spool)
+        token = storage.write_temp(iter(lambda: spool.read(CHUNK_SIZE), b''))
+    # A known blob can still lack variants: its job is only dispatched when
+    # the caller's transaction commits, and is dropped if that rolls back
+    if storage.commit(token, name) or not _blob_exists(storage, variant_name(name, _LAST_VARIANT)):
+        job_queue.enqueue(generate_upload_variants, name)
+    return name
+
+
+def _blob_exists(storage, name):
+    known = _known_blobs.get(name)
+    if known is None:
+        known = storage.exists(name)
+        _known_blobs.set(name, known, ttl=None if known else _MISS_TTL)
+    return known
+
+
+def _file_url(name):
+    if CONTENT_ADDRESSED.match(name):
+        return current_app.extensions['storage'].url(name)
+    return url_for('static', filename=f'uploads/{name}')
+
+
+def upload_url(filename, variant=None):
+    """URL for an uploaded image, preferring ``variant`` once it has been generated."""
+    if not filename:
+        return None
+    if variant and CONTENT_ADDRESSED.match(filename):
+        name = variant_name(filename, variant)
+        if _blob_exists(current_app.extensions['storage'], name):
+            return _file_url(name)
+    elif variant:
+        # Legacy uploads live in the local static folder
+        name = variant_name(filename, variant)
+        if os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], name)):
+            return _file_url(name)
+    return _file_url(filename)
+
+
+def banner_url(value):
+    """Resolve SiteConfig.banner_image, which holds an external URL or an uploaded file's URL."""
+    if not value or urlparse(value).netloc:
+        return value
+    path = urlparse(value).path
+    name = os.path.basename(path)
+    # Only our own uploads have variants; other site paths are kept as they are
+    if CONTENT_ADDRESSED.match(name) or path.lstrip('/').startswith(LEGACY_UPLOAD_PREFIX):
+        return upload_url(name, 'full')
+    return value
@@ -0,0 +1,22 @@
+import argparse
+from dotenv import load_dotenv
+from project import create_app
+from project.timeline import AUDIENCES, SQLTimelineStore, rebuild_timeline
+
+load_dotenv(override=True)
+
+
+def rebuild_timelines(max_length=None):
+    """Refills the timeline_entry table, e.g. after posts were loaded outside the app."""
+    app = create_app()
+    with app.app_context():
+        store = SQLTimelineStore(max_length or app.config['TIMELINE_MAX_LENGTH'])
+        for audience in AUDIENCES:
+            count = rebuild_timeline(store, audience)
+            print(f"Rebuilt '{audience}' timeline with {count} posts")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the precomputed feed timelines from the posts table.")
+    parser.add_argument("--max-length", type=int, help="Entries kept per timeline (default: TIMELINE_MAX_LENGTH)")
+    args = parser.parse_args()
+    rebuild_timelines(args.max_length)
@@ -0,0 +1,17 @@
+from dotenv import load_dotenv
+from project import create_app
+from project.likes import like_counter, recount_like_counts
+
+load_dotenv(override=True)
+
+
+def recount_likes():
+    """Recomputes every post's like_count from post_like, e.g. after a worker was killed mid-buffer."""
+    app = create_app()
+    with app.app_context():
+        like_counter.flush()
+        corrected = recount_like_counts()
+        print(f"Corrected like counts on {corrected} posts")
+
+if __name__ == "__main__":
+    recount_likes()
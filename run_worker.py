@@ -0,0 +1,28 @@
+import argparse
+import logging
+from dotenv import load_dotenv
+from project import create_app
+from project.jobs import job_queue
+
+load_dotenv(override=True)
+
+
+def run_worker(concurrency=None, once=False):
+    """Runs jobs queued in the job table (JOBS_BACKEND=sql)."""
+    app = create_app()
+    if job_queue.backend != 'sql':
+        print(f"JOBS_BACKEND is '{job_queue.backend}'; jobs run inside the web processes, nothing to do.")
+        return
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    print(f"Worker started (concurrency {concurrency or app.config['JOBS_WORKERS']}).")
+    try:
+        job_queue.run_worker(concurrency, once)
+    except KeyboardInterrupt:
+        print("Worker stopped.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background jobs from the job table.")
+    parser.add_argument("--concurrency", type=int, help="Jobs run at once (default: JOBS_WORKERS)")
+    parser.add_argument("--once", action="store_true", help="Exit once no jobs are due instead of polling")
+    args = parser.parse_args()
+    run_worker(args.concurrency, args.once)
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import event
+
+from benchmarks.seed import seed
+from project import create_app, db
+from project.config import Config, engine_options
+
+# Small enough to seed in well under a second, large enough that a per-row
+# lazy load would show up as hundreds of queries
+SEED_SCALE = 0.002
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp('app')
+    database_url = f"sqlite:///{tmp / 'test.db'}"
+    with pytest.MonkeyPatch.context() as mp:
+        # Config reads the real .env on import; point everything at scratch space
+        mp.setattr(Config, 'SQLALCHEMY_DATABASE_URI', database_url)
+        mp.setattr(Config, 'SQLALCHEMY_ENGINE_OPTIONS', engine_options(database_url))
+        mp.setattr(Config, 'UPLOAD_FOLDER', str(tmp / 'uploads'))
+        mp.setattr(Config, 'TESTING', True, raising=False)
+        mp.setattr(Config, 'WTF_CSRF_ENABLED', False, raising=False)
+        mp.setattr(Config, 'PAGE_CACHE_TTL', 0)
+        mp.setattr(Config, 'JOBS_BACKEND', 'sync')
+        mp.setattr(Config, 'JOBS_RETRY_BASE_DELAY', 0)
+        mp.setattr(Config, 'REQUEST_LOG_ENABLED', False)
+        mp.setattr(Config, 'SLOW_QUERY_LOG_ENABLED', False)
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            app.config['SEED_COUNTS'] = seed(scale=SEED_SCALE)
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    def login_as(user_id):
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(user_id)
+            sess['_fresh'] = True
+        return client
+    return login_as
+
+
+@pytest.fixture
+def query_counter(app):
+    """Counts SQL statements sent to the database while the test runs."""
+    class Counter:
+        count = 0
+
+    def count(*args):
+        Counter.count += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    yield Counter
+    event.remove(engine, 'before_cursor_execute', count)
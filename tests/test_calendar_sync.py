@@ -0,0 +1,92 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from project import db
+from project.calendar_sync import DELETE, FakeCalendarClient, calendar_event_id, queue_event_sync, sync_user_calendar
+from project.models import CalendarChange, CalendarSyncState, Event, OAuthToken
+
+USER_ID = 1
+
+
+@pytest.fixture
+def fake(app, monkeypatch):
+    client = FakeCalendarClient()
+    monkeypatch.setitem(app.extensions, 'calendar', client)
+    monkeypatch.setitem(app.config, 'CALENDAR_SYNC_BACKEND', 'fake')
+    with app.app_context():
+        db.session.add(OAuthToken(name='google', user_id=USER_ID, access_token='access-0',
+                                  refresh_token='refresh-0', expires_at=int(time.time()) + 3600))
+        db.session.commit()
+    yield client
+    with app.app_context():
+        db.session.execute(db.delete(CalendarChange).where(CalendarChange.user_id == USER_ID))
+        db.session.execute(db.delete(CalendarSyncState).where(CalendarSyncState.user_id == USER_ID))
+        db.session.execute(db.delete(OAuthToken).where(OAuthToken.user_id == USER_ID))
+        db.session.execute(db.delete(Event).where(Event.title.like('Synced%')))
+        db.session.commit()
+
+
+def _remote(app, fake):
+    return fake.calendars[('refresh-0', app.config['GOOGLE_CALENDAR_ID'])]
+
+
+def _queued():
+    return CalendarChange.query.filter_by(user_id=USER_ID).count()
+
+
+def _create_event(title):
+    start = datetime.utcnow() + timedelta(days=3)
+    event = Event(title=title, start_datetime=start, end_datetime=start + timedelta(hours=1), created_by=USER_ID)
+    db.session.add(event)
+    db.session.flush()
+    queue_event_sync(event)
+    db.session.commit()  # the sync job runs inline once this commits
+    return event
+
+
+def test_insert_update_and_delete_reach_the_calendar(app, fake):
+    with app.app_context():
+        event = _create_event('Synced meetup')
+        remote_id = calendar_event_id(event)
+        assert event.calendar_event_id == remote_id
+        assert _remote(app, fake)[remote_id]['summary'] == 'Synced meetup'
+        assert _queued() == 0
+
+        event.title = 'Synced meetup (moved)'
+        queue_event_sync(event)
+        db.session.commit()
+        assert _remote(app, fake)[remote_id]['summary'] == 'Synced meetup (moved)'
+        assert _queued() == 0
+
+        queue_event_sync(event, DELETE)
+        db.session.delete(event)
+        db.session.commit()
+        assert _remote(app, fake)[remote_id]['status'] == 'cancelled'
+        assert _queued() == 0
+
+
+def test_transient_error_is_retried(app, fake):
+    fake.fail_next(times=1)
+    with app.app_context():
+        event = _create_event('Synced retry')
+        # The first attempt got a 503; the job's retry pushed it
+        assert fake.batches == [1, 1]
+        assert _remote(app, fake)[event.calendar_event_id]['summary'] == 'Synced retry'
+        assert _queued() == 0
+
+
+def test_failed_push_stays_queued(app, fake):
+    fake.fail_next(times=sync_user_calendar.max_attempts)
+    with app.app_context():
+        event = _create_event('Synced outage')
+        assert event.calendar_event_id is None
+        assert _remote(app, fake) == {}
+        assert _queued() == 1
+
+        # The next sync (e.g. a later edit or sign-in) sends it
+        sync_user_calendar(USER_ID)
+        db.session.refresh(event)
+        assert _remote(app, fake)[event.calendar_event_id]['summary'] == 'Synced outage'
+        assert _queued() == 0
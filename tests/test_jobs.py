@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from project import db
+from project.jobs import FAILED, QUEUED, RUNNING, job, job_queue
+from project.models import Job
+
+calls = []
+
+
+@job(max_attempts=3)
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError('transient')
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+@pytest.fixture
+def sql_queue(app, monkeypatch):
+    monkeypatch.setattr(job_queue, 'backend', 'sql')
+    yield job_queue
+    with app.app_context():
+        db.session.execute(db.delete(Job))
+        db.session.commit()
+
+
+def _enqueue(queue, *args):
+    queue.enqueue(flaky, *args)
+    db.session.commit()
+    return db.session.scalar(db.select(Job.id).order_by(Job.id.desc()))
+
+
+def test_sync_backend_retries_until_success(app):
+    with app.app_context():
+        job_queue.enqueue(flaky, 2)
+    assert len(calls) == 3
+
+
+def test_sync_failure_does_not_escape_commit(app):
+    with app.app_context():
+        db.session.execute(db.text('SELECT 1'))
+        job_queue.enqueue(flaky, 10)
+        db.session.commit()  # the job fails every attempt after the commit
+        db.session.rollback()  # the session is still usable
+    assert len(calls) == flaky.max_attempts
+
+
+def test_sql_jobs_are_written_with_the_transaction(app, sql_queue):
+    with app.app_context():
+        sql_queue.enqueue(flaky, 0)
+        db.session.rollback()
+        assert Job.query.count() == 0
+
+        sql_queue.enqueue(flaky, 0)
+        sql_queue.enqueue(flaky, 0)  # queued once per transaction
+        db.session.commit()
+        assert Job.query.filter_by(status=QUEUED).count() == 1
+    assert calls == []
+
+
+def test_claim_takes_each_job_once(app, sql_queue):
+    with app.app_context():
+        job_id = _enqueue(sql_queue, 0)
+        assert sql_queue._claim(10) == [job_id]
+        assert sql_queue._claim(10) == []
+
+        row = db.session.get(Job, job_id)
+        assert (row.status, row.attempts) == (RUNNING, 1)
+        assert row.locked_at is not None
+
+
+def test_expired_lease_is_requeued_and_live_one_renewed(app, sql_queue):
+    lease = timedelta(seconds=60)
+    with app.app_context():
+        stale_id, live_id = _enqueue(sql_queue, 0), _enqueue(sql_queue, 1)
+        sql_queue._claim(10)
+        db.session.get(Job, stale_id).locked_at = datetime.utcnow() - 2 * lease
+        db.session.get(Job, live_id).locked_at = datetime.utcnow() - lease / 2
+        db.session.commit()
+
+        sql_queue._renew_leases([live_id])
+        sql_queue._requeue_expired(lease)
+        db.session.expire_all()
+
+        stale, live = db.session.get(Job, stale_id), db.session.get(Job, live_id)
+        assert (stale.status, stale.locked_at) == (QUEUED, None)
+        assert live.status == RUNNING
+        assert live.locked_at > datetime.utcnow() - timedelta(seconds=5)
+
+
+def test_worker_retries_then_deletes_succeeded_job(app, sql_queue):
+    with app.app_context():
+        job_id = _enqueue(sql_queue, 1)
+    sql_queue.run_worker(once=True)
+
+    assert len(calls) == 2
+    with app.app_context():
+        assert db.session.get(Job, job_id) is None
+
+
+def test_worker_marks_exhausted_job_failed(app, sql_queue):
+    with app.app_context():
+        job_id = _enqueue(sql_queue, 10)
+    sql_queue.run_worker(once=True)
+
+    assert len(calls) == flaky.max_attempts
+    with app.app_context():
+        row = db.session.get(Job, job_id)
+        assert (row.status, row.attempts, row.locked_at) == (FAILED, flaky.max_attempts, None)
+        assert row.last_error == 'RuntimeError: transient'
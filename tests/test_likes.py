@@ -0,0 +1,66 @@
+import pytest
+
+from project import db
+from project.likes import like_counter, recount_like_counts, toggle_like
+from project.models import Post, PostLike
+
+
+@pytest.fixture
+def post_id(app, monkeypatch):
+    # Buffer deltas until the test flushes them
+    monkeypatch.setattr(like_counter, 'interval', 3600)
+    monkeypatch.setattr(like_counter, 'max_pending', 10000)
+    with app.app_context():
+        post = Post(title='Likeable', content='Like me', author_id=1)
+        db.session.add(post)
+        db.session.commit()
+        post_id = post.id
+    yield post_id
+    with app.app_context():
+        like_counter.flush()
+        db.session.execute(db.delete(PostLike).where(PostLike.post_id == post_id))
+        db.session.execute(db.delete(Post).where(Post.id == post_id))
+        db.session.commit()
+
+
+def _stored_count(post_id):
+    db.session.expire_all()
+    return db.session.get(Post, post_id).like_count
+
+
+def test_toggles_coalesce_into_one_flush(app, post_id):
+    with app.app_context():
+        for user_id in (1, 2, 3):
+            assert toggle_like(user_id, post_id) is True
+        assert toggle_like(3, post_id) is False
+        assert toggle_like(2, post_id, liked=True) is True  # a retried like changes nothing
+
+        assert like_counter.pending(post_id) == 2
+        assert _stored_count(post_id) == 0
+        assert like_counter.like_count(db.session.get(Post, post_id)) == 2
+
+        assert like_counter.flush() == 1
+        assert like_counter.pending(post_id) == 0
+        assert _stored_count(post_id) == 2
+
+
+def test_like_then_unlike_writes_nothing(app, post_id):
+    with app.app_context():
+        toggle_like(1, post_id)
+        toggle_like(1, post_id)
+        assert like_counter.flush() == 0
+        assert _stored_count(post_id) == 0
+
+
+def test_recount_repairs_lost_deltas(app, post_id):
+    with app.app_context():
+        toggle_like(1, post_id)
+        toggle_like(2, post_id)
+        # The process dies before flushing
+        with like_counter._lock:
+            like_counter._pending.pop(post_id)
+
+        assert _stored_count(post_id) == 0
+        assert recount_like_counts() == 1
+        assert _stored_count(post_id) == PostLike.query.filter_by(post_id=post_id).count() == 2
+        assert recount_like_counts() == 0
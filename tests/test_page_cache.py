@@ -0,0 +1,65 @@
+import pytest
+
+from project import db
+from project.cache import TTLCache, page_cache
+from project.models import Event
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(page_cache, 'backend', TTLCache(maxsize=100, ttl=60))
+    monkeypatch.setattr(page_cache, 'enabled', True)
+    return page_cache.backend
+
+
+@pytest.fixture
+def event_id(app):
+    with app.app_context():
+        return db.session.scalar(db.select(Event.id).order_by(Event.id))
+
+
+def test_repeat_visit_revalidates_with_304(client, cache, event_id, query_counter):
+    first = client.get(f'/event/{event_id}')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    query_counter.count = 0
+    again = client.get(f'/event/{event_id}', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert query_counter.count == 0
+
+    assert client.get(f'/event/{event_id}').data == first.data
+
+
+def test_commit_to_watched_model_invalidates(app, client, cache, event_id):
+    etag = client.get(f'/event/{event_id}').headers['ETag']
+
+    with app.app_context():
+        event = db.session.get(Event, event_id)
+        original = event.title
+        event.title = 'Renamed while cached'
+        db.session.rollback()  # a rollback leaves the cache alone
+    assert client.get(f'/event/{event_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        event = db.session.get(Event, event_id)
+        event.title = 'Renamed while cached'
+        db.session.commit()
+    try:
+        response = client.get(f'/event/{event_id}', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert b'Renamed while cached' in response.data
+        assert response.headers['ETag'] != etag
+    finally:
+        with app.app_context():
+            db.session.get(Event, event_id).title = original
+            db.session.commit()
+
+
+def test_signed_in_users_bypass_the_cache(login, cache, event_id):
+    client = login(1)
+    response = client.get(f'/event/{event_id}')
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
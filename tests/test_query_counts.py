@@ -0,0 +1,86 @@
+import pytest
+from sqlalchemy import event, func
+
+from project import db
+from project.models import Comment, User
+
+# Upper bounds on SQL statements per request. They must not grow with the
+# number of posts, comments or users on the page: one extra lazy load per
+# row would blow through them.
+MAX_QUERIES = {
+    'dashboard_public': 10,
+    'dashboard_admin': 10,
+    'profile': 8,
+    'comments': 6,
+}
+
+
+def _public_user(app):
+    with app.app_context():
+        return User.query.filter_by(role='public').order_by(User.id.desc()).first().id
+
+
+@pytest.mark.parametrize('page, path, role', [
+    ('dashboard_public', '/auth/dashboard/public', 'public'),
+    ('dashboard_admin', '/auth/dashboard/admin', 'admin'),
+])
+def test_dashboard_query_count_is_bounded(app, login, query_counter, page, path, role):
+    client = login(1 if role == 'admin' else _public_user(app))
+    client.get(path)  # warm caches (site config, current user) out of the count
+
+    query_counter.count = 0
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert query_counter.count <= MAX_QUERIES[page]
+
+
+def test_profile_query_count_is_bounded(client, query_counter):
+    # The seeded admin is a team member, so the page lists events they
+    # created as well as ones they attend
+    client.get('/profile/1')
+
+    query_counter.count = 0
+    response = client.get('/profile/1')
+
+    assert response.status_code == 200
+    assert query_counter.count <= MAX_QUERIES['profile']
+
+
+def test_comment_page_query_count_is_bounded(app, login, query_counter):
+    with app.app_context():
+        post_id = Comment.query.with_entities(Comment.post_id).group_by(Comment.post_id).order_by(
+            func.count().desc()
+        ).first().post_id
+    client = login(_public_user(app))
+    client.get(f'/auth/post/{post_id}/comments')
+
+    query_counter.count = 0
+    response = client.get(f'/auth/post/{post_id}/comments')
+
+    assert response.status_code == 200
+    assert response.get_json()['comments']
+    assert query_counter.count <= MAX_QUERIES['comments']
+
+
+def test_public_dashboard_reuses_totals_and_limits_events(app, login):
+    client = login(_public_user(app))
+    client.get('/auth/dashboard/public')
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get('/auth/dashboard/public')
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+    assert response.status_code == 200
+    # Post and user totals come from the cache, not a COUNT(*) per view
+    assert not any('count(post.id)' in sql or 'count(users.id)' in sql for sql in statements)
+    assert response.data.count(b'View &amp; Register') <= app.config['FEED_UPCOMING_EVENTS']
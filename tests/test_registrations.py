@@ -0,0 +1,154 @@
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from project import db
+from project.models import Event, Registration
+from project.registrations import ImportAborted, import_registrations
+
+
+@pytest.fixture
+def make_event(app):
+    created = []
+
+    def make(capacity):
+        with app.app_context():
+            start = datetime.utcnow() + timedelta(days=7)
+            event = Event(title='Workshop', start_datetime=start, end_datetime=start + timedelta(hours=2),
+                          capacity=capacity, created_by=1)
+            db.session.add(event)
+            db.session.commit()
+            created.append(event.id)
+            return event.id
+
+    yield make
+    with app.app_context():
+        db.session.execute(db.delete(Registration).where(Registration.event_id.in_(created)))
+        db.session.execute(db.delete(Event).where(Event.id.in_(created)))
+        db.session.commit()
+
+
+def _register(client, event_id, email, key=None):
+    headers = {'Idempotency-Key': key} if key else {}
+    return client.post(f'/register/{event_id}', json={'name': 'Guest', 'email': email}, headers=headers)
+
+
+def _seats(app, event_id):
+    with app.app_context():
+        rows = Registration.query.filter_by(event_id=event_id).count()
+        return rows, db.session.get(Event, event_id).registration_count
+
+
+def test_full_event_returns_409(app, client, make_event):
+    event_id = make_event(capacity=2)
+    assert _register(client, event_id, 'a@example.com').status_code == 201
+    assert _register(client, event_id, 'b@example.com').status_code == 201
+
+    response = _register(client, event_id, 'c@example.com')
+    assert response.status_code == 409
+    assert response.get_json()['status'] == 'event_full'
+    assert _seats(app, event_id) == (2, 2)
+
+
+def test_replayed_idempotency_key_returns_original(app, client, make_event):
+    event_id = make_event(capacity=5)
+    first = _register(client, event_id, 'a@example.com', key='retry-1')
+    # A retry with the same key is recognised even if the body changed
+    replay = _register(client, event_id, 'other@example.com', key='retry-1')
+
+    assert first.status_code == 201
+    assert replay.status_code == 200
+    assert replay.get_json() == {'status': 'already_registered', 'registration_id': first.get_json()['registration_id']}
+    assert _seats(app, event_id) == (1, 1)
+
+
+def test_duplicate_email_is_already_registered(app, client, make_event):
+    event_id = make_event(capacity=5)
+    first = _register(client, event_id, 'a@example.com')
+    duplicate = _register(client, event_id, '  A@Example.com ')
+
+    assert duplicate.status_code == 200
+    assert duplicate.get_json() == {'status': 'already_registered', 'registration_id': first.get_json()['registration_id']}
+    assert _seats(app, event_id) == (1, 1)
+
+
+def test_concurrent_burst_never_overbooks(app, make_event):
+    capacity, attempts = 5, 40
+    event_id = make_event(capacity=capacity)
+
+    def register(i):
+        return _register(app.test_client(), event_id, f'guest{i}@example.com').status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(register, range(attempts)))
+
+    assert statuses.count(201) == capacity
+    assert statuses.count(409) == attempts - capacity
+    assert _seats(app, event_id) == (capacity, capacity)
+
+
+def _rows_then_error(count):
+    for i in range(count):
+        yield 'Guest', f'guest{i}@example.com'
+    raise csv.Error('unexpected end of data')
+
+
+def test_aborted_import_reports_committed_rows(app, make_event):
+    event_id = make_event(capacity=None)
+    with app.app_context():
+        with pytest.raises(ImportAborted) as excinfo:
+            import_registrations(event_id, _rows_then_error(7), batch_size=3)
+        db.session.rollback()
+
+        assert excinfo.value.summary['imported'] == 7
+        assert _seats(app, event_id) == (7, 7)
+
+        # Importing the fixed file again only adds what was missing
+        rows = [('Guest', f'guest{i}@example.com') for i in range(10)]
+        summary = import_registrations(event_id, rows, batch_size=3)
+        assert summary == {'imported': 3, 'duplicates': 7, 'invalid': 0, 'over_capacity': 0}
+
+
+def test_import_route_reports_partial_import(app, login, make_event):
+    event_id = make_event(capacity=None)
+    good = ''.join(f'Guest {i},guest{i}@example.com\n' for i in range(3))
+    data = ('name,email\n' + good).encode() + b'Bad,\xff\xfe@example.com\n'
+
+    response = login(1).post(
+        f'/event/{event_id}/registrations/import',
+        data={'file': (io.BytesIO(data), 'guests.csv')},
+        follow_redirects=True
+    )
+    rows, _ = _seats(app, event_id)
+    assert response.status_code == 200
+    assert b'Could not read the whole CSV file' in response.data
+    assert f'{rows} registrations read before the error were imported'.encode() in response.data
+
+
+def test_import_route_summarises_outcomes(app, login, make_event):
+    event_id = make_event(capacity=2)
+    data = b'Name,Email\nA,a@example.com\nB,A@example.com\n,c@example.com\nD,d@example.com\nE,e@example.com\n'
+
+    response = login(1).post(
+        f'/event/{event_id}/registrations/import',
+        data={'file': (io.BytesIO(data), 'guests.csv')},
+        follow_redirects=True
+    )
+    assert b'Imported 2 registrations (1 duplicates, 1 over capacity, 1 invalid rows skipped)' in response.data
+    assert _seats(app, event_id) == (2, 2)
+
+
+def test_csv_export_escapes_formulas(app, client, login, make_event):
+    event_id = make_event(capacity=None)
+    with app.app_context():
+        import_registrations(event_id, [('=HYPERLINK("http://evil.example")', 'x@example.com'), ('Plain', 'y@example.com')])
+
+    response = login(1).get(f'/event/{event_id}/participants.csv')
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ['source', 'name', 'email', 'registered_at']
+    names = {row[1] for row in rows[1:]}
+    assert names == {'\'=HYPERLINK("http://evil.example")', 'Plain'}
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from project import db
+from project.models import Event, Post
+from project.search import install_search_schema, search
+
+
+@pytest.fixture
+def post_id(app):
+    with app.app_context():
+        post = Post(title='Quokka meetup recap', content='Notes from the zanzibarquux session', author_id=1)
+        db.session.add(post)
+        db.session.commit()
+        post_id = post.id
+    yield post_id
+    with app.app_context():
+        db.session.execute(db.delete(Post).where(Post.id == post_id))
+        db.session.commit()
+
+
+def _post_ids(query):
+    return [result.item.id for result in search(query, kinds=['post']).results]
+
+
+def test_triggers_keep_the_index_current(app, post_id):
+    with app.app_context():
+        assert _post_ids('zanzibarquux') == [post_id]
+        assert _post_ids('zanzibar') == [post_id]  # the last term matches as a prefix
+
+        post = db.session.get(Post, post_id)
+        post.content = 'Rewritten after the fact'
+        db.session.commit()
+        assert _post_ids('zanzibarquux') == []
+        assert _post_ids('rewritten') == [post_id]
+
+        db.session.delete(post)
+        db.session.commit()
+        assert _post_ids('rewritten') == []
+
+
+def test_install_backfills_existing_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    # Tables from before search existed: no index, no triggers
+    with engine.begin() as connection:
+        db.metadata.create_all(connection)
+        for name, in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_search_%'"
+        ).all():
+            connection.exec_driver_sql(f"DROP TRIGGER {name}")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS search_index")
+        connection.execute(Post.__table__.insert(), {'id': 1, 'title': 'Old news', 'content': 'pre-existing wombat'})
+        now = datetime.utcnow()
+        connection.execute(Event.__table__.insert(), {
+            'id': 1, 'title': 'Wombat walk', 'start_datetime': now, 'end_datetime': now, 'registration_count': 0
+        })
+
+    with engine.begin() as connection:
+        install_search_schema(connection)
+        # Running it again (every create_all does) must not index rows twice
+        install_search_schema(connection)
+        rowids = [rowid for rowid, in connection.exec_driver_sql(
+            "SELECT rowid FROM search_index WHERE search_index MATCH 'wombat' ORDER BY rowid"
+        )]
+    engine.dispose()
+    assert rowids == [1 * 4 + 1, 1 * 4 + 2]
+
+
+def test_anonymous_search_hides_posts(app, client, login, post_id):
+    anonymous = client.get('/search?q=zanzibarquux&type=post')
+    assert anonymous.status_code == 200
+    assert b'Quokka meetup recap' not in anonymous.data
+
+    member = login(1).get('/search?q=zanzibarquux')
+    assert b'Quokka meetup recap' in member.data
@@ -0,0 +1,140 @@
+import io
+import os
+import socket
+
+import pytest
+from werkzeug.datastructures import FileStorage
+from PIL import Image
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from project.storage import CHUNK_SIZE, LocalStorage, S3Storage
+from project.uploads import InvalidImage, save_image_upload
+
+BUCKET = 'uploads'
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope='module')
+def s3_endpoint():
+    """A local S3-compatible server standing in for MinIO."""
+    server_module = pytest.importorskip('moto.server')
+    port = _free_port()
+    server = server_module.ThreadedMotoServer(ip_address='127.0.0.1', port=port)
+    server.start()
+    yield f'http://127.0.0.1:{port}'
+    server.stop()
+
+
+@pytest.fixture(params=['local', 's3'])
+def storage(request, tmp_path):
+    if request.param == 'local':
+        yield LocalStorage(str(tmp_path))
+        return
+    storage = S3Storage(
+        bucket=BUCKET,
+        endpoint_url=request.getfixturevalue('s3_endpoint'),
+        region='us-east-1',
+        access_key='test',
+        secret_key='test'
+    )
+    storage.client.create_bucket(Bucket=BUCKET)
+    yield storage
+    for obj in storage.client.list_objects_v2(Bucket=BUCKET).get('Contents', []):
+        storage.client.delete_object(Bucket=BUCKET, Key=obj['Key'])
+
+
+def test_commit_stores_each_name_once(storage):
+    token = storage.write_temp([b'hello ', b'world'])
+    assert storage.commit(token, 'blob.txt') is True
+    assert storage.exists('blob.txt')
+
+    duplicate = storage.write_temp([b'hello world'])
+    assert storage.commit(duplicate, 'blob.txt') is False
+    with storage.open('blob.txt') as fh:
+        assert fh.read() == b'hello world'
+
+
+def test_write_and_exists(storage):
+    assert not storage.exists('missing.webp')
+    storage.write('thumb.webp', b'\x00' * 10)
+    assert storage.exists('thumb.webp')
+
+
+def test_large_upload_streams_in_parts(storage):
+    # Larger than S3Storage.PART_SIZE, so S3 takes the multipart path
+    chunk = b'x' * CHUNK_SIZE
+    count = (S3Storage.PART_SIZE + S3Storage.PART_SIZE // 2) // CHUNK_SIZE
+    token = storage.write_temp(chunk for _ in range(count))
+    assert storage.commit(token, 'large.bin')
+    with storage.open('large.bin') as fh:
+        assert len(fh.read()) == CHUNK_SIZE * count
+
+
+def _stored_names(root):
+    return os.listdir(root) if os.path.isdir(root) else []
+
+
+class _CountingStream(io.RawIOBase):
+    """An endless request body that records how much has been read from it."""
+
+    def __init__(self):
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        buffer[:] = b'x' * len(buffer)
+        self.bytes_read += len(buffer)
+        return len(buffer)
+
+
+def test_upload_size_cap_is_enforced_while_reading(app):
+    stream = _CountingStream()
+    max_bytes = app.config['UPLOAD_MAX_BYTES']
+    with app.test_request_context():
+        with pytest.raises(RequestEntityTooLarge):
+            save_image_upload(FileStorage(io.BufferedReader(stream), 'big.png'), 'big.png')
+        root = app.extensions['storage'].root
+
+    # Rejected within a chunk or two of the cap, and no partial file left behind
+    assert stream.bytes_read <= max_bytes + 2 * CHUNK_SIZE + io.DEFAULT_BUFFER_SIZE
+    assert not any(name.endswith('.part') for name in _stored_names(root))
+
+
+def _png_bytes():
+    out = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(out, 'PNG')
+    return out.getvalue()
+
+
+def test_non_image_upload_is_rejected(app):
+    html = b'<script>alert(document.cookie)</script>'
+    with app.test_request_context():
+        with pytest.raises(InvalidImage) as excinfo:
+            save_image_upload(FileStorage(io.BytesIO(html), 'x.html'), 'x.html')
+        root = app.extensions['storage'].root
+
+    assert excinfo.value.code == 400
+    assert not any(name.endswith(('.html', '.part')) for name in _stored_names(root))
+
+
+def test_upload_is_named_by_detected_format(app, client):
+    data = _png_bytes()
+    with app.test_request_context():
+        name = save_image_upload(FileStorage(io.BytesIO(data), 'photo.html'), 'photo.html')
+
+    assert name.endswith('.png')
+    response = client.get(f'/media/{name}')
+    assert response.status_code == 200
+    assert response.data == data
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+
+
+def test_media_refuses_non_image_names(client):
+    assert client.get('/media/' + 'a' * 64 + '.html').status_code == 404
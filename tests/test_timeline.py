@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from project import db
+from project.models import Post, TimelineEntry, TimelineState
+from project.timeline import AUDIENCE_PUBLIC, MemoryTimelineStore, SQLTimelineStore, ensure_built, publish_post
+
+
+class FailingStore(MemoryTimelineStore):
+    def push(self, audience, post_id, created_at):
+        raise RuntimeError('timeline unavailable')
+
+
+@pytest.fixture
+def new_post(app):
+    with app.app_context():
+        post = Post(title='Fresh', content='Just posted', author_id=1, created_at=datetime.utcnow())
+        db.session.add(post)
+        db.session.commit()
+        post_id = post.id
+    yield post_id
+    with app.app_context():
+        db.session.execute(db.delete(Post).where(Post.id == post_id))
+        db.session.commit()
+
+
+def _newest_id(store):
+    return store.page(AUDIENCE_PUBLIC, limit=1)[0][1]
+
+
+def test_failed_push_marks_timeline_stale(app, monkeypatch, new_post):
+    store = FailingStore(max_length=50)
+    monkeypatch.setitem(app.extensions, 'timeline', store)
+    with app.app_context():
+        ensure_built(store, AUDIENCE_PUBLIC)
+        store.remove(AUDIENCE_PUBLIC, new_post)  # as if it was built just before the post
+
+        publish_post(db.session.get(Post, new_post))
+        assert not store.is_built(AUDIENCE_PUBLIC)
+
+        ensure_built(store, AUDIENCE_PUBLIC)
+        assert _newest_id(store) == new_post
+
+
+def test_sql_store_tracks_built_state_for_empty_timeline(app, query_counter):
+    store = SQLTimelineStore(max_length=50)
+    audience = 'empty'
+    with app.app_context():
+        assert not store.is_built(audience)
+        store.rebuild(audience, [])
+
+        query_counter.count = 0
+        ensure_built(store, audience)
+        # One lookup of the marker row, no DELETE/COMMIT on the read path
+        assert query_counter.count == 1
+        assert store.page(audience) == []
+
+        store.mark_stale(audience)
+        assert not store.is_built(audience)
+        db.session.execute(db.delete(TimelineState).where(TimelineState.audience == audience))
+        db.session.commit()
+
+
+def test_expired_timeline_picks_up_posts_inserted_directly(app, new_post):
+    store = SQLTimelineStore(max_length=50, rebuild_after=60)
+    with app.app_context():
+        entries = db.session.execute(
+            db.select(Post.created_at, Post.id).where(Post.id != new_post)
+        ).all()
+        store.rebuild(AUDIENCE_PUBLIC, [tuple(row) for row in entries])
+        ensure_built(store, AUDIENCE_PUBLIC)
+        assert _newest_id(store) != new_post
+
+        state = db.session.get(TimelineState, AUDIENCE_PUBLIC)
+        state.built_at = datetime.utcnow() - timedelta(seconds=61)
+        db.session.commit()
+
+        ensure_built(store, AUDIENCE_PUBLIC)
+        assert _newest_id(store) == new_post
+
+        db.session.execute(db.delete(TimelineEntry))
+        db.session.execute(db.delete(TimelineState))
+        db.session.commit()